@@ -2,3 +2,6 @@ pip install -r requirements.txt
 python manage.py migrate
 python manage.py collectstatic --noinput
 python manage.py createsuperuser --noinput || true
+
+# Streaming imports and ?async=1 prints are queued, not run, by the API:
+# start a worker next to the web server with `python manage.py run_jobs`.
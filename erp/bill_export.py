@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+
+import django
+from django.conf import settings
+from pypdf import PdfWriter, PdfReader
+
+from .service_bill import service_bill_pdf_queryset, render_service_bill_pdf
+
+
+# --------------------------------------------------
+# BATCH SERVICE BILL EXPORT
+# --------------------------------------------------
+
+def load_bills(ids=None, date_from=None, date_to=None):
+    """All requested bills with their PDF rows, in one prefetch"""
+    qs = service_bill_pdf_queryset()
+    if ids:
+        qs = qs.filter(id__in=ids)
+    if date_from:
+        qs = qs.filter(bill_date__gte=date_from)
+    if date_to:
+        qs = qs.filter(bill_date__lte=date_to)
+    return list(qs.order_by("bill_date", "id"))
+
+
+def _render(bill):
+    """Render one bill into a temp file and return its path"""
+    fd, path = tempfile.mkstemp(prefix=f"service-bill-{bill.id}-", suffix=".pdf")
+    with os.fdopen(fd, "wb") as out, render_service_bill_pdf(bill) as pdf:
+        shutil.copyfileobj(pdf, out)
+    return path
+
+
+# One pool per process, started by the first large export and reused by every
+# later one: spawning workers and running django.setup() in each costs
+# seconds, far more than rendering a handful of bills.
+_pool = None
+_pool_workers = 0
+
+
+def _get_pool(workers):
+    global _pool, _pool_workers
+
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        # spawned workers start clean (no inherited DB sockets) and set
+        # Django up from DJANGO_SETTINGS_MODULE before their first task
+        _pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context("spawn"),
+            initializer=django.setup,
+        )
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool():
+    global _pool, _pool_workers
+
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+    _pool = None
+    _pool_workers = 0
+
+
+def _render_all(bills):
+    workers = min(settings.PDF_EXPORT_WORKERS or os.cpu_count() or 1, len(bills))
+    if workers <= 1 or len(bills) < settings.PDF_EXPORT_PARALLEL_MIN:
+        return [_render(bill) for bill in bills]
+
+    try:
+        return list(_get_pool(workers).map(_render, bills))
+    except BrokenProcessPool:
+        # a worker died (e.g. killed for memory), start a new pool next time
+        shutdown_pool()
+        return [_render(bill) for bill in bills]
+
+
+@contextmanager
+def rendered_bills(bills):
+    """
+    Paths of the rendered PDFs, in bill order; the files are removed when
+    the block exits. Batches of PDF_EXPORT_PARALLEL_MIN bills and more go
+    to the process pool. Bills are pickled with their prefetched rows, so
+    workers never touch the database, and hand back file paths, not bytes.
+    """
+    paths = []
+    try:
+        paths = _render_all(bills)
+        yield paths
+    finally:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def write_merged_pdf(paths, out):
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(PdfReader(path))
+    writer.write(out)
+
+
+def write_zip(bills, paths, out):
+    # PDFs are already compressed, deflating them again only costs time
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as zf:
+        for bill, path in zip(bills, paths):
+            zf.write(path, f"service-bill-{bill.id}.pdf")
@@ -0,0 +1,271 @@
+import os
+from itertools import islice
+
+import pandas as pd
+from openpyxl import load_workbook
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Dealer, Place, Destination, ImportJob
+from .reference_cache import bump_version
+
+
+# rows per INSERT / IN (...) lookup, keeps SQLite under its variable limit
+BULK_BATCH_SIZE = 1000
+
+# rows committed per transaction in streaming mode
+STREAM_CHUNK_SIZE = 1000
+
+# Accepted header names for every field we read (compared lower-cased)
+REQUIRED_COLUMNS = {
+    "code": ["code", "dealer code", "Customer No"],
+    "name": ["name", "dealer name", "Name 1"],
+    "mobile": ["mobile", "phone", "mob no.", "mob.no."],
+    "pincode": ["pincode", "pin", "pin code"],
+    "place": ["place", "Unloading Point"],
+    "distance": ["distance", "km", "Distance from Rail Head", "RH Distance"],
+}
+
+
+def safe_float(val):
+    if pd.isna(val):
+        return 0
+    val = str(val).strip()
+    if val == "" or val.lower() == "nil" or val == "-":
+        return 0
+    try:
+        return float(val)
+    except:
+        return 0
+
+
+def clean_number(val):
+    """Clean mobile/pincode values from Excel"""
+    if pd.isna(val):
+        return ""
+
+    s = str(val).strip()
+
+    # Remove trailing .0 (Excel float)
+    if s.endswith(".0"):
+        s = s[:-2]
+
+    # Remove spaces
+    s = s.replace(" ", "")
+
+    # Convert scientific notation (e.g., 6.78E5)
+    if "e" in s.lower():
+        try:
+            s = str(int(float(s)))
+        except:
+            pass
+
+    return s
+
+
+def map_columns(columns):
+    """
+    Match sheet headers against REQUIRED_COLUMNS.
+    Returns (col_map, missing_field) - missing_field is None when all found.
+    """
+    col_map = {}
+    for field, possible in REQUIRED_COLUMNS.items():
+        accepted = [p.lower() for p in possible]
+        found = next((col for col in columns if col in accepted), None)
+        if not found:
+            return col_map, field
+        col_map[field] = found
+    return col_map, None
+
+
+def _chunks(values, size=BULK_BATCH_SIZE):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def import_dealer_rows(destination, district, rows):
+    """
+    Set-based import of one sheet (or one chunk of a sheet).
+
+    `rows` is an iterable of dicts keyed like REQUIRED_COLUMNS.
+    Existing places / dealers are resolved with one lookup each, missing ones
+    are bulk inserted and the Dealer <-> Place links are written in a single
+    bulk insert. Keys are uppercased up front so lookups match what
+    UppercaseMixin stores (bulk_create skips save()).
+    """
+    place_distance = {}
+    dealer_fields = {}
+    links = set()
+
+    for row in rows:
+        place_name = str(row["place"]).strip().upper()
+        code = str(row["code"]).strip().upper()
+
+        # first occurrence wins, same as get_or_create defaults
+        place_distance.setdefault(place_name, safe_float(row["distance"]))
+        dealer_fields.setdefault(code, {
+            "name": str(row["name"]).strip(),
+            "mobile": clean_number(row["mobile"]),
+            "pincode": clean_number(row["pincode"]),
+        })
+        links.add((code, place_name))
+
+    if not links:
+        return {"dealers_created": 0, "places_created": 0}
+
+    # ---- Places (name is unique per destination) ----
+    places = {
+        p.name: p
+        for p in Place.objects.filter(destination=destination).only("id", "name")
+    }
+    new_places = []
+    for name, distance in place_distance.items():
+        if name in places:
+            continue
+        place = Place(name=name, district=district, destination=destination, distance=distance)
+        place._uppercase_fields()
+        new_places.append(place)
+    Place.objects.bulk_create(new_places, batch_size=BULK_BATCH_SIZE)
+    places.update((p.name, p) for p in new_places)
+
+    # ---- Dealers ----
+    dealers = {}
+    for codes in _chunks(dealer_fields):
+        dealers.update(
+            (d.code, d) for d in Dealer.objects.filter(code__in=codes).only("id", "code")
+        )
+    new_dealers = []
+    for code, fields in dealer_fields.items():
+        if code in dealers:
+            continue
+        dealer = Dealer(code=code, **fields)
+        dealer._uppercase_fields()
+        new_dealers.append(dealer)
+    Dealer.objects.bulk_create(new_dealers, batch_size=BULK_BATCH_SIZE)
+    dealers.update((d.code, d) for d in new_dealers)
+
+    # ---- Dealer <-> Place (M2M through table) ----
+    Through = Dealer.places.through
+    Through.objects.bulk_create(
+        [
+            Through(dealer_id=dealers[code].id, place_id=places[place_name].id)
+            for code, place_name in links
+        ],
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    # bulk_create sends no post_save / m2m_changed, refresh the cached
+    # place and dealer lists here
+    transaction.on_commit(lambda: (bump_version(Dealer), bump_version(Place)))
+
+    return {
+        "dealers_created": len(new_dealers),
+        "places_created": len(new_places),
+    }
+
+
+# --------------------------------------------------
+# STREAMING MODE
+# --------------------------------------------------
+
+def run_streaming_import(job_id):
+    """
+    Stream an uploaded workbook row by row (openpyxl read_only) and import it
+    in STREAM_CHUNK_SIZE chunks, committing each chunk on its own. A failing
+    chunk is recorded in job.errors and the import carries on with the next
+    one; progress counters are written after every chunk.
+    """
+    job = ImportJob.objects.get(pk=job_id)
+    errors = []
+
+    def add_error(**error):
+        errors.append(error)
+        ImportJob.objects.filter(pk=job.pk).update(errors=errors, updated_at=timezone.now())
+
+    ImportJob.objects.filter(pk=job.pk).update(status="RUNNING", updated_at=timezone.now())
+
+    try:
+        workbook = load_workbook(job.file_path, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                _stream_sheet(job, sheet, add_error)
+        finally:
+            workbook.close()
+        status = "DONE"
+    except Exception as e:
+        add_error(sheet=None, rows=None, error=str(e))
+        status = "FAILED"
+    finally:
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+
+    ImportJob.objects.filter(pk=job.pk).update(
+        status=status,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def _stream_sheet(job, sheet, add_error):
+    sheet_name = sheet.title
+    rows = sheet.iter_rows(values_only=True)
+
+    header = next(rows, None)
+    if not header or all(h is None for h in header):
+        return
+
+    columns = [str(h).lower().strip() if h is not None else "" for h in header]
+    col_map, missing = map_columns(columns)
+    if missing:
+        add_error(
+            sheet=sheet_name,
+            rows=None,
+            error=f"Column '{missing}' missing. Expected one of {REQUIRED_COLUMNS[missing]}",
+        )
+        return
+
+    positions = {field: columns.index(col) for field, col in col_map.items()}
+
+    destination, created = Destination.objects.get_or_create(
+        name=f"{sheet_name} FOL", place=sheet_name, defaults={"is_garage": False}
+    )
+    if created:
+        ImportJob.objects.filter(pk=job.pk).update(
+            destinations_created=F("destinations_created") + 1,
+            updated_at=timezone.now(),
+        )
+
+    district = sheet_name if sheet_name != "Sheet1" else None
+    first_row = 2  # 1-based Excel row number, row 1 is the header
+
+    while True:
+        chunk = list(islice(rows, STREAM_CHUNK_SIZE))
+        if not chunk:
+            break
+
+        last_row = first_row + len(chunk) - 1
+        records = []
+        for values in chunk:
+            record = {
+                field: values[i] if i < len(values) else None
+                for field, i in positions.items()
+            }
+            if any(v is not None for v in record.values()):
+                records.append(record)
+
+        counts = {"dealers_created": 0, "places_created": 0}
+        try:
+            with transaction.atomic():
+                counts = import_dealer_rows(destination, district, records)
+        except Exception as e:
+            add_error(sheet=sheet_name, rows=f"{first_row}-{last_row}", error=str(e))
+
+        ImportJob.objects.filter(pk=job.pk).update(
+            rows_processed=F("rows_processed") + len(records),
+            dealers_created=F("dealers_created") + counts["dealers_created"],
+            places_created=F("places_created") + counts["places_created"],
+            updated_at=timezone.now(),
+        )
+        first_row = last_row + 1
@@ -0,0 +1,98 @@
+# filters.py
+from django.db import connection
+from django.db.models import Q, Exists, OuterRef, Case, When, Value, IntegerField
+from django.db.models.functions import Greatest
+from rest_framework import filters
+
+
+_has_trigram = None
+
+
+def has_trigram_extension():
+    """pg_trgm installed on the current database (checked once per process)"""
+    global _has_trigram
+
+    if _has_trigram is None:
+        _has_trigram = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                _has_trigram = cursor.fetchone() is not None
+    return _has_trigram
+
+
+class TrigramSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter for autocomplete-heavy viewsets.
+
+    - Fields reached through a to-many relation (e.g. places__name) are
+      matched with an EXISTS subquery, so rows are never fanned out by the
+      join and no DISTINCT is needed.
+    - Results are ranked by `search_rank_fields` on the view: pg_trgm
+      similarity on PostgreSQL (icontains is served by the GIN trigram
+      indexes from migration 0021), exact / prefix match on SQLite or
+      when the extension is not installed.
+      ?ordering= still takes precedence through OrderingFilter.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+
+        if not search_fields or not search_terms:
+            return queryset
+
+        model = queryset.model
+
+        for term in search_terms:
+            conditions = Q()
+            for field in search_fields:
+                lookup = {f"{field.lstrip('^=@$')}__icontains": term}
+
+                if self._spans_many(model, field):
+                    conditions |= Q(Exists(
+                        model._default_manager.filter(pk=OuterRef("pk"), **lookup)
+                    ))
+                else:
+                    conditions |= Q(**lookup)
+
+            queryset = queryset.filter(conditions)
+
+        rank_fields = getattr(view, "search_rank_fields", None)
+        if rank_fields:
+            rank = self.rank_expression(rank_fields, " ".join(search_terms))
+            queryset = queryset.annotate(search_rank=rank).order_by(
+                "-search_rank", *queryset.query.order_by
+            )
+
+        return queryset
+
+    def rank_expression(self, fields, term):
+        if has_trigram_extension():
+            from django.contrib.postgres.search import TrigramSimilarity
+
+            scores = [TrigramSimilarity(f, term) for f in fields]
+            return Greatest(*scores) if len(scores) > 1 else scores[0]
+
+        # fallback (SQLite / no pg_trgm): exact match > prefix match > anything else
+        return Case(
+            *[When(**{f"{f}__iexact": term}, then=Value(2)) for f in fields],
+            *[When(**{f"{f}__istartswith": term}, then=Value(1)) for f in fields],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+
+    @staticmethod
+    def _spans_many(model, field_path):
+        opts = model._meta
+        for part in field_path.lstrip("^=@$").split("__"):
+            try:
+                field = opts.get_field(part)
+            except Exception:
+                return False
+            if field.many_to_many or field.one_to_many:
+                return True
+            if not field.is_relation:
+                return False
+            opts = field.related_model._meta
+        return False
@@ -0,0 +1,88 @@
+from django.db import connection
+from django.db.models import Q, Sum, Min
+
+from .models import RangeEntry
+
+
+# --------------------------------------------------
+# TRANSPORT FOL PREVIEW
+# --------------------------------------------------
+
+# headroom for the non-id parameters of the query
+_OTHER_PARAMS = 10
+
+
+def _chunks(ids):
+    """
+    Split the id list so one query never exceeds the backend's parameter
+    limit (999 on SQLite, none on PostgreSQL, where this is one chunk).
+    """
+    limit = connection.features.max_query_params
+    size = max(limit - _OTHER_PARAMS, 1) if limit else max(len(ids), 1)
+    for i in range(0, len(ids), size):
+        yield ids[i:i + size]
+
+
+def load_fol_preview_groups(destination_entry_ids):
+    """
+    Slab -> destination totals of the TRANSPORT_FOL slab ranges of the
+    given entries, summed in the database (one GROUP BY query per chunk).
+
+    Returns [(rate_range_id, [group, ...]), ...] in order of first range id,
+    each group a dict with destination_entry_id (lowest entry id of that
+    destination), destination_place, qty_mt, qty_mtk and amount.
+    """
+    ids = list(dict.fromkeys(destination_entry_ids))
+    groups = {}
+
+    for chunk in _chunks(ids):
+        rows = (
+            RangeEntry.objects
+            .filter(
+                Q(destination_entry_id__in=chunk) &
+                Q(Q(destination_entry__transport_type="TRANSPORT_FOL") |
+                Q(destination_entry__destination__is_garage=False) ) &
+                Q(rate_range__isnull=False)
+            )
+            .values(
+                "rate_range_id",
+                "destination_entry__destination_id",
+                "destination_entry__destination__place",
+            )
+            .annotate(
+                first_id=Min("id"),
+                first_entry_id=Min("destination_entry_id"),
+                qty_mt=Sum("total_mt"),
+                qty_mtk=Sum("total_mtk"),
+                amount=Sum("total_amount"),
+            )
+            .order_by()
+        )
+
+        # chunks are disjoint sets of entries, so partial groups just add up
+        for r in rows:
+            key = (r["rate_range_id"], r["destination_entry__destination_id"])
+            group = groups.get(key)
+            if group is None:
+                groups[key] = {
+                    "first_id": r["first_id"],
+                    "destination_entry_id": r["first_entry_id"],
+                    "destination_place": r["destination_entry__destination__place"],
+                    "qty_mt": r["qty_mt"] or 0,
+                    "qty_mtk": r["qty_mtk"] or 0,
+                    "amount": r["amount"] or 0,
+                }
+                continue
+
+            group["first_id"] = min(group["first_id"], r["first_id"])
+            group["destination_entry_id"] = min(group["destination_entry_id"], r["first_entry_id"])
+            group["qty_mt"] += r["qty_mt"] or 0
+            group["qty_mtk"] += r["qty_mtk"] or 0
+            group["amount"] += r["amount"] or 0
+
+    # slabs and destinations in the order their first range was stored
+    slabs = {}
+    for (rate_range_id, _), group in sorted(groups.items(), key=lambda kv: kv[1]["first_id"]):
+        slabs.setdefault(rate_range_id, []).append(group)
+
+    return list(slabs.items())
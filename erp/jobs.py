@@ -0,0 +1,148 @@
+import os
+import shutil
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import BackgroundJob
+from .dealer_import import run_streaming_import
+from .service_bill import generate_service_bill_pdf
+
+
+# --------------------------------------------------
+# HANDLERS
+# --------------------------------------------------
+
+def _write_result_file(job, buffer, extension):
+    os.makedirs(settings.JOB_RESULTS_DIR, exist_ok=True)
+    path = os.path.join(settings.JOB_RESULTS_DIR, f"job-{job.id}.{extension}")
+    with open(path, "wb") as out:
+        shutil.copyfileobj(buffer, out)
+    return path
+
+
+def _dealer_import(job):
+    run_streaming_import(job.payload["import_job_id"])
+    return {"import_job_id": job.payload["import_job_id"]}, None
+
+
+def _destination_entry_pdf(job):
+    # views imports this module, so resolve the PDF builder lazily
+    from .views import DestinationEntryViewSet
+
+    buffer = DestinationEntryViewSet().generate_pdf(job.payload["id"])
+    return None, _write_result_file(job, buffer, "pdf")
+
+
+def _service_bill_pdf(job):
+    buffer = generate_service_bill_pdf(job.payload["id"])
+    return None, _write_result_file(job, buffer, "pdf")
+
+
+# kind -> callable(job) returning (result, result_path)
+JOB_HANDLERS = {
+    "DEALER_IMPORT": _dealer_import,
+    "DESTINATION_ENTRY_PDF": _destination_entry_pdf,
+    "SERVICE_BILL_PDF": _service_bill_pdf,
+}
+
+# file name used when a PDF result is downloaded
+RESULT_FILENAMES = {
+    "DESTINATION_ENTRY_PDF": "destination-entry-{id}.pdf",
+    "SERVICE_BILL_PDF": "service-bill-{id}.pdf",
+}
+
+
+# --------------------------------------------------
+# QUEUE
+# --------------------------------------------------
+
+def enqueue(kind, **payload):
+    if kind not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+    return BackgroundJob.objects.create(kind=kind, payload=payload)
+
+
+def claim_next_job():
+    """
+    Take the oldest queued job. The conditional UPDATE is the lock: when two
+    workers race for the same row only one of them gets rowcount 1, so this
+    works on SQLite as well as PostgreSQL without SELECT ... FOR UPDATE.
+    """
+    while True:
+        job = BackgroundJob.objects.filter(status="QUEUED").order_by("id").first()
+        if job is None:
+            return None
+
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(pk=job.pk, status="QUEUED").update(
+            status="RUNNING",
+            started_at=now,
+        )
+        if claimed:
+            job.status = "RUNNING"
+            job.started_at = now
+            return job
+
+
+def requeue_stale_jobs(stale_after=None):
+    """
+    Put RUNNING jobs that started more than `stale_after` seconds ago
+    (JOB_STALE_AFTER by default) back in the queue: their worker died
+    before it could record a result. One conditional UPDATE, like the
+    claim, so a job is requeued once however many workers run this.
+    Returns the number of requeued jobs.
+    """
+    if stale_after is None:
+        stale_after = settings.JOB_STALE_AFTER
+
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    return BackgroundJob.objects.filter(status="RUNNING", started_at__lt=cutoff).update(
+        status="QUEUED",
+        started_at=None,
+    )
+
+
+def purge_job_results(max_age=None):
+    """
+    Delete the result files of jobs that finished more than `max_age`
+    seconds ago (JOB_RESULTS_MAX_AGE by default) and clear their
+    result_path. Returns the number of purged jobs.
+    """
+    if max_age is None:
+        max_age = settings.JOB_RESULTS_MAX_AGE
+
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    expired = list(
+        BackgroundJob.objects
+        .filter(finished_at__lt=cutoff, result_path__isnull=False)
+        .values_list("id", "result_path")
+    )
+
+    for _, path in expired:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    BackgroundJob.objects.filter(id__in=[job_id for job_id, _ in expired]).update(result_path=None)
+    return len(expired)
+
+
+def run_job(job):
+    handler = JOB_HANDLERS[job.kind]
+    try:
+        result, result_path = handler(job)
+    except Exception:
+        job.status = "FAILED"
+        job.error = traceback.format_exc()
+    else:
+        job.status = "DONE"
+        job.result = result
+        job.result_path = result_path
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "result", "result_path", "error", "finished_at"])
+    return job
@@ -0,0 +1,83 @@
+import time
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from openpyxl import Workbook
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from erp.views import DealerViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a synthetic dealer workbook and time /dealers/import_excel/ "
+        "on it, reporting rows per second. "
+        "Everything is rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000, help="Dealer rows in the workbook.")
+        parser.add_argument("--sheets", type=int, default=5, help="Sheets (destinations) the rows are spread over.")
+        parser.add_argument("--places", type=int, default=500, help="Distinct places per sheet.")
+        parser.add_argument("--keep", action="store_true", help="Commit the imported rows.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        workbook = self._workbook(options["rows"], options["sheets"], options["places"])
+        self.stdout.write(
+            f"Built {options['rows']} rows in {options['sheets']} sheets "
+            f"({len(workbook) / 1024 / 1024:.1f} MB) in {time.perf_counter() - started:.1f} s"
+        )
+
+        with transaction.atomic():
+            self._run(workbook, options["rows"])
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def _workbook(self, n_rows, n_sheets, n_places):
+        wb = Workbook(write_only=True)
+        per_sheet = -(-n_rows // n_sheets)
+
+        for s in range(n_sheets):
+            ws = wb.create_sheet(f"BENCH{s}")
+            ws.append(["Customer No", "Name 1", "Mob No.", "Pincode", "Unloading Point", "Distance"])
+
+            for i in range(s * per_sheet, min((s + 1) * per_sheet, n_rows)):
+                place = i % n_places
+                ws.append([
+                    f"BENCH{i:07d}",
+                    f"BENCH DEALER {i}",
+                    9000000000 + i,
+                    670000 + place,
+                    f"BENCH PLACE {place}",
+                    place % 300,
+                ])
+
+        out = BytesIO()
+        wb.save(out)
+        return out.getvalue()
+
+    def _run(self, workbook, n_rows):
+        upload = SimpleUploadedFile(
+            "bench.xlsx",
+            workbook,
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+        request = APIRequestFactory().post("/dealers/import_excel/", {"file": upload}, format="multipart")
+        force_authenticate(request, user=User(username="bench"))
+        view = DealerViewSet.as_view({"post": "import_excel"})
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = view(request)
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(f"{response.status_code} {dict(response.data)}")
+        self.stdout.write(
+            f"{n_rows} rows, {len(queries)} queries, {elapsed:.1f} s, {n_rows / elapsed:.0f} rows/s"
+        )
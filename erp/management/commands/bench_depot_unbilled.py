@@ -0,0 +1,93 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from erp.models import Destination, RateRange, DestinationEntry, RangeEntry, DealerEntry
+from erp.views import DestinationEntryViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed unbilled TRANSPORT_DEPOT ranges and time "
+        "/destination-entries/transport-depot-unbilled/ against them. "
+        "Everything is rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ranges", type=int, default=1000, help="Unbilled ranges to create.")
+        parser.add_argument("--dealers-per-range", type=int, default=3, help="Dealer lines per range.")
+        parser.add_argument("--ranges-per-entry", type=int, default=10, help="Ranges per destination entry.")
+        parser.add_argument("--keep", action="store_true", help="Commit the seeded rows.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._seed(options["ranges"], options["dealers_per_range"], options["ranges_per_entry"])
+            self._run()
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+    def _seed(self, n_ranges, dealers_per_range, ranges_per_entry):
+        destination = Destination.objects.create(name="BENCH DEPOT", place="BENCH", is_garage=False)
+        rate_range = RateRange.objects.create(from_km=0, to_km=50, rate=100)
+
+        n_entries = -(-n_ranges // ranges_per_entry)
+        entries = DestinationEntry.objects.bulk_create([
+            DestinationEntry(
+                destination=destination,
+                bill_number=f"BENCH-{i}",
+                date="2025-01-01",
+                transport_type="TRANSPORT_DEPOT",
+            )
+            for i in range(n_entries)
+        ])
+
+        ranges = RangeEntry.objects.bulk_create([
+            RangeEntry(
+                destination_entry=entries[i // ranges_per_entry],
+                rate_range=rate_range,
+                rate=100,
+                total_bags=dealers_per_range * 20,
+                total_mt=dealers_per_range,
+                total_mtk=dealers_per_range * 25,
+                total_amount=dealers_per_range * 2500,
+            )
+            for i in range(n_ranges)
+        ])
+
+        DealerEntry.objects.bulk_create([
+            DealerEntry(
+                range_entry=r,
+                despatched_to="BENCH PLACE",
+                km=25,
+                no_bags=20,
+                rate=100,
+                mt=1,
+                mtk=25,
+                amount=2500,
+                mda_number=f"MDA-{r.id}-{j}",
+                date="2025-01-01",
+            )
+            for r in ranges
+            for j in range(dealers_per_range)
+        ])
+
+        self.stdout.write(f"Seeded {n_entries} entries, {n_ranges} ranges, {n_ranges * dealers_per_range} dealer lines")
+
+    def _run(self):
+        request = APIRequestFactory().get("/destination-entries/transport-depot-unbilled/")
+        force_authenticate(request, user=User(username="bench"))
+        view = DestinationEntryViewSet.as_view({"get": "transport_depot_unbilled"})
+
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = view(request)
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{len(response.data['results'])} rows, {len(queries)} queries, {elapsed * 1000:.0f} ms"
+        )
@@ -0,0 +1,65 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from erp.jobs import claim_next_job, purge_job_results, requeue_stale_jobs, run_job
+
+
+# seconds between two sweeps of expired result files
+PURGE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs (Excel imports, PDF rendering). "
+        "Keep one running next to the web server: the API only queues these jobs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue once and exit.",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=None,
+            help="Requeue RUNNING jobs started this many seconds ago (default: JOB_STALE_AFTER).",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Job worker started")
+        last_purge = None
+
+        while True:
+            close_old_connections()
+
+            if last_purge is None or time.monotonic() - last_purge >= PURGE_INTERVAL:
+                purged = purge_job_results()
+                if purged:
+                    self.stdout.write(f"Deleted result files of {purged} job(s)")
+                last_purge = time.monotonic()
+
+            requeued = requeue_stale_jobs(options["stale_after"])
+            if requeued:
+                self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+            job = claim_next_job()
+
+            if job is None:
+                if options["once"]:
+                    return
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(f"Running job #{job.id} ({job.kind})")
+            job = run_job(job)
+            self.stdout.write(f"Job #{job.id} {job.status}")
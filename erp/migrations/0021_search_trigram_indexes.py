@@ -0,0 +1,50 @@
+from django.db import migrations
+
+
+# (index name, table, column) - GIN trigram indexes on UPPER(column), the
+# expression Django emits for icontains on PostgreSQL
+TRIGRAM_INDEXES = [
+    ("erp_dealer_name_trgm", "erp_dealer", "name"),
+    ("erp_dealer_code_trgm", "erp_dealer", "code"),
+    ("erp_dealer_mobile_trgm", "erp_dealer", "mobile"),
+    ("erp_place_name_trgm", "erp_place", "name"),
+    ("erp_place_district_trgm", "erp_place", "district"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # SQLite has no GIN / pg_trgm, search falls back to plain LIKE there
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if cursor.fetchone() is None:
+            # contrib not installed on this server, search works without the indexes
+            return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table} "
+            f"USING gin (UPPER({column}::text) gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0020_backgroundjob'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
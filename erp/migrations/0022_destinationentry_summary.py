@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-17 16:18
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def fill_destination_entry_summary(apps, schema_editor):
+    DestinationEntry = apps.get_model("erp", "DestinationEntry")
+    RangeEntry = apps.get_model("erp", "RangeEntry")
+    DealerEntry = apps.get_model("erp", "DealerEntry")
+
+    def fmt_km(val):
+        return str(int(val)) if val.is_integer() else str(val)
+
+    labels = defaultdict(list)
+    totals = defaultdict(lambda: [0, 0])
+    for r in RangeEntry.objects.select_related("rate_range").order_by("id"):
+        if r.rate_range:
+            labels[r.destination_entry_id].append(
+                f"{fmt_km(r.rate_range.from_km)}-{fmt_km(r.rate_range.to_km)}"
+            )
+        totals[r.destination_entry_id][0] += r.total_mt or 0
+        totals[r.destination_entry_id][1] += r.total_amount or 0
+
+    products = defaultdict(set)
+    for entry_id, description in DealerEntry.objects.values_list(
+        "range_entry__destination_entry_id", "description"
+    ):
+        if description:
+            products[entry_id].add(description)
+
+    entries = list(DestinationEntry.objects.all())
+    for entry in entries:
+        entry.products_summary = "\n".join(sorted(products[entry.id]))
+        entry.rate_ranges_summary = "\n".join(labels[entry.id])
+        entry.total_mt, entry.total_amount = totals[entry.id]
+
+    DestinationEntry.objects.bulk_update(
+        entries,
+        ["products_summary", "rate_ranges_summary", "total_mt", "total_amount"],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0021_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destinationentry',
+            name='products_summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='destinationentry',
+            name='rate_ranges_summary',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='destinationentry',
+            name='total_amount',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='destinationentry',
+            name='total_mt',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(fill_destination_entry_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-17 17:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('erp', '0022_destinationentry_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='job',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_job', to='erp.backgroundjob'),
+        ),
+    ]
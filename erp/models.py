@@ -82,7 +82,7 @@ class RateRange(models.Model):
 
 
 class DestinationEntry(UppercaseMixin, models.Model):
-    UPPERCASE_EXCLUDE = ["letter_note"]
+    UPPERCASE_EXCLUDE = ["letter_note", "products_summary"]
 
     destination = models.ForeignKey(Destination, on_delete=models.CASCADE)
     letter_note = models.TextField(null=True, blank=True)
@@ -97,6 +97,12 @@ class DestinationEntry(UppercaseMixin, models.Model):
 
     service_bill = models.ForeignKey("ServiceBill", on_delete=models.SET_NULL, null=True, blank=True, related_name="destination_entries")
 
+    # denormalized from range / dealer entries, kept up to date by DestinationEntryWriteSerializer
+    products_summary = models.TextField(blank=True, default="")      # one description per line
+    rate_ranges_summary = models.TextField(blank=True, default="")   # one "50-75" label per line
+    total_mt = models.FloatField(default=0)
+    total_amount = models.FloatField(default=0)
+
     def __str__(self):
         return f"Entry #{self.id} - {self.destination.name}"
     
@@ -351,4 +357,72 @@ class TransportFOLDestination(UppercaseMixin, models.Model):
     
     def __str__(self):
         return f"{self.destination_place} | MT: {self.qty_mt}"
-    
\ No newline at end of file
+    
+
+class ImportJob(models.Model):
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    file_name = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+
+    # progress counters, updated after every committed chunk
+    rows_processed = models.IntegerField(default=0)
+    dealers_created = models.IntegerField(default=0)
+    places_created = models.IntegerField(default=0)
+    destinations_created = models.IntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+    # queue entry that runs this import (manage.py run_jobs); the import
+    # stays PENDING while that job is QUEUED
+    job = models.OneToOneField(
+        "BackgroundJob",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="import_job",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import #{self.id} - {self.file_name} ({self.status})"
+
+
+class BackgroundJob(models.Model):
+    KIND_CHOICES = [
+        ("DEALER_IMPORT", "Dealer Import"),
+        ("DESTINATION_ENTRY_PDF", "Destination Entry PDF"),
+        ("SERVICE_BILL_PDF", "Service Bill PDF"),
+    ]
+    STATUS_CHOICES = [
+        ("QUEUED", "Queued"),
+        ("RUNNING", "Running"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=50, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="QUEUED")
+    payload = models.JSONField(default=dict, blank=True)
+
+    result = models.JSONField(null=True, blank=True)
+    result_path = models.CharField(max_length=500, null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "id"])]
+
+    def __str__(self):
+        return f"Job #{self.id} - {self.kind} ({self.status})"
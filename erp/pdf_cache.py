@@ -0,0 +1,172 @@
+import os
+import json
+import shutil
+import glob
+import hashlib
+import tempfile
+
+from django.conf import settings
+
+from .models import (
+    ServiceBill,
+    HandlingBillSection,
+    TransportDepotSection,
+    TransportDepotRow,
+    TransportFOLSection,
+    TransportFOLSlab,
+    TransportFOLDestination,
+)
+
+
+# bump when the PDF layout code changes so old renders are not served
+PDF_LAYOUT_VERSION = 1
+
+
+# --------------------------------------------------
+# SOURCE DIGESTS
+# --------------------------------------------------
+
+def _digest(kind, payload):
+    raw = json.dumps([kind, PDF_LAYOUT_VERSION, payload], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def destination_entry_digest(entry, ranges):
+    """
+    Hash of everything the destination entry PDF is laid out from,
+    taking the (entry, ranges) pair from load_destination_entry_print_data.
+    """
+    destination = entry.destination
+    payload = {
+        "entry": [entry.bill_number, entry.date, entry.letter_note, entry.to_address],
+        "destination": destination.name,
+        "ranges": [
+            [
+                r.id,
+                r.rate_range.from_km,
+                r.rate_range.to_km,
+                r.rate,
+                r.total_bags,
+                r.total_mt,
+                r.total_mtk,
+                r.total_amount,
+                r.print_page_no,
+                dealer_rows,
+            ]
+            for r, dealer_rows in ranges
+        ],
+    }
+    return _digest("destination-entry", payload)
+
+
+def service_bill_digest(service_bill_id):
+    """
+    Hash of the bill and its handling / depot / FOL rows, read with
+    values() so nothing is instantiated. Raises ServiceBill.DoesNotExist.
+    """
+    bill = ServiceBill.objects.filter(id=service_bill_id).values().get()
+    payload = {
+        "bill": bill,
+        "handling": list(HandlingBillSection.objects.filter(bill_id=service_bill_id).values()),
+        "depot": list(TransportDepotSection.objects.filter(bill_id=service_bill_id).values()),
+        "depot_rows": list(
+            TransportDepotRow.objects
+            .filter(depot_section__bill_id=service_bill_id)
+            .order_by("id")
+            .values("id", "destination__name", "qty_mt", "km", "mt_km", "rate", "amount")
+        ),
+        "fol": list(
+            TransportFOLSection.objects
+            .filter(bill_id=service_bill_id)
+            .values("bill_number", "rh_qty")
+        ),
+        "fol_slabs": list(
+            TransportFOLSlab.objects
+            .filter(fol_section__bill_id=service_bill_id)
+            .order_by("id")
+            .values("id", "range_slab", "rate")
+        ),
+        "fol_destinations": list(
+            TransportFOLDestination.objects
+            .filter(fol_slab__fol_section__bill_id=service_bill_id)
+            .order_by("id")
+            .values("fol_slab_id", "destination_place", "qty_mt", "qty_mtk", "amount")
+        ),
+    }
+    return _digest("service-bill", payload)
+
+
+# --------------------------------------------------
+# DISK STORE
+# --------------------------------------------------
+# Files are named <kind>-<id>-<digest>.pdf. The digest makes a stale
+# render unreachable; the id lets signals drop every render of a document.
+# File mtime is the LRU clock: a hit touches it, eviction removes the oldest.
+
+def _path(kind, obj_id, digest):
+    return os.path.join(settings.PDF_CACHE_DIR, f"{kind}-{obj_id}-{digest}.pdf")
+
+
+def open_cached(kind, obj_id, digest):
+    """Open file of a cached render, or None on a miss"""
+    path = _path(kind, obj_id, digest)
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        # evicted after open, the handle still reads the old file
+        pass
+    return f
+
+
+def store(kind, obj_id, digest, buffer):
+    """Write a rendered PDF into the cache and evict down to PDF_CACHE_MAX_BYTES"""
+    os.makedirs(settings.PDF_CACHE_DIR, exist_ok=True)
+
+    # write to a temp file first so readers never see a half written PDF
+    fd, tmp = tempfile.mkstemp(dir=settings.PDF_CACHE_DIR, suffix=".tmp")
+    with os.fdopen(fd, "wb") as out:
+        shutil.copyfileobj(buffer, out)
+    os.replace(tmp, _path(kind, obj_id, digest))
+    buffer.seek(0)
+
+    evict()
+
+
+def evict(max_bytes=None):
+    if max_bytes is None:
+        max_bytes = settings.PDF_CACHE_MAX_BYTES
+
+    entries = []
+    total = 0
+    for path in glob.glob(os.path.join(settings.PDF_CACHE_DIR, "*.pdf")):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+        total += st.st_size
+
+    entries.sort()
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        _remove(path)
+        total -= size
+
+
+def invalidate(kind, obj_id):
+    """Drop every cached render of one document"""
+    for path in glob.glob(os.path.join(settings.PDF_CACHE_DIR, f"{kind}-{obj_id}-*.pdf")):
+        _remove(path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,201 @@
+import tempfile
+
+from django.conf import settings
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph, Table, TableStyle
+
+
+# Static building blocks of the PDFs, built once per process and shared by
+# every document. Reportlab only keeps the result of wrap() on a flowable,
+# and the frames these are laid out in never change size, so reusing them
+# gives the same output as building them per request.
+
+
+# --------------------------------------------------
+# OUTPUT
+# --------------------------------------------------
+
+def pdf_output():
+    """
+    Buffer the builders render into: in memory up to PDF_SPOOL_MAX_BYTES,
+    a temp file on disk past that. Read it back in chunks, never getvalue().
+    """
+    return tempfile.SpooledTemporaryFile(max_size=settings.PDF_SPOOL_MAX_BYTES)
+
+
+# --------------------------------------------------
+# DESTINATION ENTRY (landscape A4)
+# --------------------------------------------------
+
+ENTRY_PAGESIZE = landscape(A4)
+ENTRY_MARGINS = {"leftMargin": 20, "rightMargin": 20, "topMargin": 120, "bottomMargin": 80}
+
+ENTRY_STYLES = getSampleStyleSheet()
+ENTRY_STYLES.add(ParagraphStyle(name='Small', fontSize=8, leading=10))
+ENTRY_STYLES.add(ParagraphStyle(name='NormalBold', fontSize=10, leading=11, fontName='Helvetica-Bold'))
+ENTRY_STYLES.add(ParagraphStyle(name='TitleBold', fontSize=13, leading=14, fontName='Helvetica-Bold', alignment=TA_LEFT))
+ENTRY_STYLES.add(ParagraphStyle(name='CustomNormal', fontSize=10, leading=12))
+ENTRY_STYLES.add(ParagraphStyle(name='CenterBold', fontSize=10, fontName='Helvetica-Bold', alignment=TA_CENTER))
+ENTRY_STYLES.add(ParagraphStyle(
+    name='SmallHeader',
+    fontSize=8,
+    leading=9,
+    fontName='Helvetica-Bold',
+    alignment=TA_CENTER
+))
+ENTRY_STYLES.add(ParagraphStyle(
+    name='Tiny',
+    fontSize=7.5,
+    leading=9
+))
+
+# left half of the page header, the right half is the entry's address
+ENTRY_COMPANY_HEADER = [
+    Paragraph("GSTIN: 32ACNFS 8060K1ZP", ENTRY_STYLES['Small']),
+    Paragraph("M/s. SHAN ENTERPRISES", ENTRY_STYLES['TitleBold']),
+    Paragraph("Clearing & Transporting contractor", ENTRY_STYLES['CustomNormal']),
+    Paragraph("21-4185, C-Meenchanda gate Calicut - 673018", ENTRY_STYLES['CustomNormal']),
+    Paragraph("Mob: 9447004108", ENTRY_STYLES['CustomNormal']),
+]
+
+ENTRY_FOOTER = Table(
+    [[
+        Paragraph("Passed by", ENTRY_STYLES['CustomNormal']),
+        "",
+        Paragraph("Officer in charge", ENTRY_STYLES['CustomNormal']),
+        "",
+        Paragraph("Signature of contractor", ENTRY_STYLES['CustomNormal'])
+    ]],
+    colWidths=[140, 120, 140, 120, 140]
+)
+# fixed column widths, so one wrap serves every page
+ENTRY_FOOTER.wrap(
+    ENTRY_PAGESIZE[0] - ENTRY_MARGINS["leftMargin"] - ENTRY_MARGINS["rightMargin"],
+    ENTRY_MARGINS["bottomMargin"],
+)
+
+ENTRY_RANGE_HEADER = [
+    "SL NO", "Date", "MDA NO", "Description", "Despatched to",
+    "Bag", "MT", "KM", "MTK", "Rate", "Amount", Paragraph("Remarks / Bill.Doc.", ENTRY_STYLES['SmallHeader'])
+]
+
+
+def _entry_range_col_widths():
+    usable_width = ENTRY_PAGESIZE[0] - ENTRY_MARGINS["leftMargin"] - ENTRY_MARGINS["rightMargin"]
+    col_widths = [30, 45, 55, 70, 180, 35, 40, 40, 45, 40, 50, 40]
+    scale = (usable_width * 0.98) / sum(col_widths)
+    return [w * scale for w in col_widths]
+
+
+ENTRY_RANGE_COL_WIDTHS = _entry_range_col_widths()
+
+ENTRY_RANGE_TABLE_STYLE = TableStyle([
+    ('GRID', (0,0), (-1,-1), 0.7, colors.black),
+    ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+    ('FONT', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONT', (0,-1), (-1,-1), 'Helvetica-Bold'),
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+
+    # Global padding
+    ('LEFTPADDING', (0,0), (-1,-1), 3),
+    ('RIGHTPADDING', (0,0), (-1,-1), 3),
+
+    # 🔽 Reduce padding only for Remarks column (last column)
+    ('LEFTPADDING', (-1,0), (-1,-1), 2),
+    ('RIGHTPADDING', (-1,0), (-1,-1), 2),
+])
+
+
+# --------------------------------------------------
+# SERVICE BILL (portrait A4)
+# --------------------------------------------------
+
+HEADER = ParagraphStyle(
+    "HEADER",
+    fontSize=12,
+    alignment=TA_CENTER,
+    spaceAfter=6,
+    leading=12,
+)
+
+RIGHT = ParagraphStyle(
+    "RIGHT",
+    fontSize=11,
+    alignment=TA_RIGHT,
+)
+
+NORMAL = ParagraphStyle(
+    "NORMAL",
+    fontSize=11,
+    leading=12,
+    linespacing=4,
+)
+
+BOLD = ParagraphStyle(
+    "BOLD",
+    fontSize=11,
+    leading=12,
+    fontName="Helvetica-Bold",
+)
+
+BILL_COMPANY_HEADER = Paragraph(
+    "<b>M/S. SHAN ENTERPRISES</b><br/>"
+    "GST32ACNFS8060K1ZP<br/>"
+    "Clearing &amp; Transporting Contractor<br/>"
+    "21/4185 C, Meenchanda Rly. Gate<br/>"
+    "P.O. Arts College Calicut – 673018<br/>"
+    "Mob: 9447004108",
+    ParagraphStyle(
+        "company",
+        fontSize=12,
+        leading=15,
+    )
+)
+
+FACT_GST = Paragraph(
+    "<b>FACT GST 32AAACT6204C1Z2</b>",
+    ParagraphStyle("factgst", alignment=TA_CENTER, fontSize=9)
+)
+
+WESTHILL_RH = Paragraph("<b>WESTHILL RH</b>", NORMAL)
+
+CLEARING_BOX_TITLE = Paragraph("<b>Date of Clearing</b>", NORMAL)
+
+BANK_DETAILS = Paragraph(
+    "Kindly arrange payment to M/S. Shan Enterprises, through IFSC NO.<br/>"
+    "CNRB0014404 – A/C. No.44041400000041 "
+    "Canara Bank, Panniyankara, Calicut.",
+    NORMAL
+)
+
+ACKNOWLEDGEMENT = Paragraph(
+    "Acknowledge copies of Delivery advice attached with this bill<br/>"
+    "I request you to approve this bill and payment may be made at an early date",
+    NORMAL
+)
+
+# handling pads "Yours faithfully" away from the right edge
+HANDLING_SIGN_OFF = Table(
+    [[
+        Paragraph("Thanking you", NORMAL),
+        Paragraph("Yours faithfully &nbsp; &nbsp; &nbsp;", RIGHT),
+    ]],
+    colWidths=[286, 260],
+)
+
+SIGN_OFF = Table(
+    [[
+        Paragraph("Thanking you", NORMAL),
+        Paragraph("Yours faithfully", RIGHT),
+    ]],
+    colWidths=[286, 260],
+)
+
+CLEARING_BOX_STYLE = TableStyle([
+    ("GRID", (0, 0), (-1, -1), 0.7, colors.black),
+    ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+])
@@ -0,0 +1,79 @@
+import re
+
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+
+# --------------------------------------------------
+# COLUMNAR PLACE LIST (/places/?all=1&columnar=1)
+# --------------------------------------------------
+
+def columnar_places(queryset):
+    """
+    Every place of the (filtered, ordered) queryset as parallel arrays, read
+    with one values_list query. Destination names are sent once in a lookup
+    table keyed by id instead of on every row:
+
+        {"format": "columnar",
+         "ids": [...], "names": [...], "destination_ids": [...],
+         "destinations": {"<id>": "<name>", ...}}
+    """
+    ids, names, destination_ids = [], [], []
+    destinations = {}
+
+    rows = queryset.values_list("id", "name", "destination_id", "destination__name")
+    for place_id, name, destination_id, destination_name in rows.iterator(chunk_size=5000):
+        ids.append(place_id)
+        names.append(name)
+        destination_ids.append(destination_id)
+        if destination_id is not None:
+            destinations[destination_id] = destination_name
+
+    return {
+        "format": "columnar",
+        "ids": ids,
+        "names": names,
+        "destination_ids": destination_ids,
+        "destinations": destinations,
+    }
+
+
+# --------------------------------------------------
+# GZIP
+# --------------------------------------------------
+
+_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+# below this the gzip header costs more than it saves
+GZIP_MIN_BYTES = 200
+
+
+def gzip_response(request, response):
+    """
+    Compress a rendered response when the client accepts gzip, the way
+    GZipMiddleware does, for views that send large JSON bodies.
+    """
+    patch_vary_headers(response, ("Accept-Encoding",))
+
+    if response.status_code != 200 or response.has_header("Content-Encoding"):
+        return response
+    if not _ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+        return response
+
+    response.render()
+    if len(response.content) < GZIP_MIN_BYTES:
+        return response
+
+    compressed = compress_string(response.content)
+    if len(compressed) >= len(response.content):
+        return response
+
+    response.content = compressed
+    response["Content-Length"] = str(len(compressed))
+    response["Content-Encoding"] = "gzip"
+
+    # the encoded body is no longer byte-identical to the plain one
+    etag = response.get("ETag")
+    if etag and etag.startswith('"'):
+        response["ETag"] = "W/" + etag
+    return response
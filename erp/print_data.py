@@ -0,0 +1,53 @@
+from .models import DestinationEntry, RangeEntry, DealerEntry
+
+
+# --------------------------------------------------
+# DESTINATION ENTRY PDF
+# --------------------------------------------------
+
+# column order of the dealer row tuples handed to the PDF layout
+DEALER_ROW_FIELDS = (
+    "date",
+    "mda_number",
+    "description",
+    "despatched_to",
+    "no_bags",
+    "mt",
+    "km",
+    "mtk",
+    "amount",
+    "remarks",
+    "bill_doc",
+)
+
+
+def load_destination_entry_print_data(entry_id):
+    """
+    Everything generate_pdf needs, in three queries:
+    the entry with its destination, its ranges with their rate ranges and
+    all dealer lines as plain tuples (DEALER_ROW_FIELDS order).
+
+    Returns (entry, [(range_entry, dealer_rows), ...]) with ranges and
+    dealer lines in id order. Range entries stay model instances so
+    print_page_no can be written back.
+    """
+    entry = DestinationEntry.objects.select_related("destination").get(id=entry_id)
+
+    ranges = list(
+        RangeEntry.objects
+        .filter(destination_entry=entry)
+        .select_related("rate_range")
+        .order_by("id")
+    )
+
+    rows_by_range = {r.id: [] for r in ranges}
+    dealer_rows = (
+        DealerEntry.objects
+        .filter(range_entry__destination_entry=entry)
+        .order_by("range_entry_id", "id")
+        .values_list("range_entry_id", *DEALER_ROW_FIELDS)
+    )
+    for range_entry_id, *row in dealer_rows:
+        rows_by_range[range_entry_id].append(tuple(row))
+
+    return entry, [(r, rows_by_range[r.id]) for r in ranges]
@@ -0,0 +1,76 @@
+import time
+from bisect import bisect_left
+
+from .models import RateRange
+
+
+# Signals only reach the process that saved the RateRange; other gunicorn
+# workers pick up the change when their copy expires.
+RATE_RANGE_INDEX_TTL = 60  # seconds
+
+
+class RateRangeIndex:
+    """
+    In-memory interval index over RateRange.
+
+    Every from_km / to_km is a boundary. The matching range is precomputed
+    for each boundary point and for each open gap between two neighbouring
+    boundaries, so a lookup is a single bisect. Where ranges overlap the
+    lowest id wins, same as RateRange.objects.filter(...).first().
+    """
+
+    def __init__(self, ranges):
+        ranges = sorted(ranges, key=lambda rr: rr.id)
+        self.by_id = {rr.id: rr for rr in ranges}
+
+        self.bounds = sorted({rr.from_km for rr in ranges} | {rr.to_km for rr in ranges})
+        self.at_bound = [self._match(ranges, km) for km in self.bounds]
+        self.in_gap = [
+            self._match(ranges, (lo + hi) / 2)
+            for lo, hi in zip(self.bounds, self.bounds[1:])
+        ]
+
+    @staticmethod
+    def _match(ranges, km):
+        return next((rr for rr in ranges if rr.from_km <= km <= rr.to_km), None)
+
+    def find(self, km):
+        """RateRange covering `km`, or None"""
+        if km is None or not self.bounds:
+            return None
+
+        i = bisect_left(self.bounds, km)
+        if i < len(self.bounds) and self.bounds[i] == km:
+            return self.at_bound[i]
+        if i == 0 or i == len(self.bounds):
+            return None
+        return self.in_gap[i - 1]
+
+    def get(self, rate_range_id):
+        return self.by_id.get(rate_range_id)
+
+
+_index = None
+_built_at = 0.0
+
+
+def get_rate_range_index(refresh=False):
+    global _index, _built_at
+
+    if refresh or _index is None or time.monotonic() - _built_at > RATE_RANGE_INDEX_TTL:
+        _index = RateRangeIndex(list(RateRange.objects.all()))
+        _built_at = time.monotonic()
+    return _index
+
+
+def get_rate_range(rate_range_id):
+    """Lookup by id; a miss rebuilds once in case the range is newer than the index"""
+    rr = get_rate_range_index().get(rate_range_id)
+    if rr is None:
+        rr = get_rate_range_index(refresh=True).get(rate_range_id)
+    return rr
+
+
+def invalidate_rate_range_index():
+    global _index
+    _index = None
@@ -0,0 +1,98 @@
+import time
+import hashlib
+from functools import wraps
+
+from django.core.cache import caches
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# --------------------------------------------------
+# VERSION STAMPS
+# --------------------------------------------------
+# Every reference model has a stamp (time of its last change in ns) in the
+# "reference" cache. Saves and deletes replace the stamp (erp/signals.py), so
+# every cached response built from the old stamp becomes unreachable. The
+# cache is file based so a bump in one worker is seen by all of them.
+
+def _cache():
+    return caches["reference"]
+
+
+def _version_key(model):
+    return f"refdata:version:{model._meta.label_lower}"
+
+
+def get_versions(*models):
+    """Current stamp of each model, creating missing ones"""
+    cache = _cache()
+    keys = [_version_key(m) for m in models]
+    found = cache.get_many(keys)
+
+    for key in keys:
+        if key not in found:
+            # add() keeps a stamp another worker wrote in the meantime
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump_version(model):
+    _cache().set(_version_key(model), time.time_ns(), None)
+
+
+# --------------------------------------------------
+# CACHED LIST RESPONSES
+# --------------------------------------------------
+
+def reference_cached(*models):
+    """
+    Cache a list action's response data until one of `models` changes.
+
+    The ETag is derived from the model stamps and the full request path, so
+    a conditional request is answered with 304 from the stamps alone, and a
+    plain one from the cached data: neither touches the database nor runs
+    the serializer. Only 200 responses are stored.
+
+    Search requests (autocomplete) go straight to the view: every keystroke
+    is a new path, caching them would only evict the catalogue responses.
+    No Last-Modified is sent, its one second resolution cannot tell apart
+    two changes made within the same second.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if request.query_params.get(api_settings.SEARCH_PARAM):
+                return method(self, request, *args, **kwargs)
+
+            versions = get_versions(*models)
+            path = request.get_full_path()
+            digest = hashlib.sha256(repr((versions, path)).encode()).hexdigest()
+            etag = quote_etag(digest)
+
+            if _not_modified(request, etag):
+                response = HttpResponseNotModified()
+            else:
+                key = f"refdata:response:{digest}"
+                data = _cache().get(key)
+                if data is not None:
+                    response = Response(data)
+                else:
+                    response = method(self, request, *args, **kwargs)
+                    if response.status_code == 200:
+                        _cache().set(key, response.data)
+
+            response["ETag"] = etag
+            return response
+        return wrapper
+    return decorator
+
+
+def _not_modified(request, etag):
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if not if_none_match:
+        return False
+    etags = [e.removeprefix("W/") for e in parse_etags(if_none_match)]
+    return "*" in etags or etag in etags
@@ -1,8 +1,8 @@
 from rest_framework import serializers
-from .models import Dealer, Place, Destination, RateRange, DealerEntry, RangeEntry, DestinationEntry, HandlingBillSection, TransportDepotSection, TransportFOLSection, ServiceBill, TransportFOLDestination, TransportFOLSlab, TransportItem, TransportDepotRow
-from .utils import generate_dealer_code
-from django.db import transaction
-from django.db.models import Q
+from .models import Dealer, Place, Destination, RateRange, DealerEntry, RangeEntry, DestinationEntry, HandlingBillSection, TransportDepotSection, TransportFOLSection, ServiceBill, TransportFOLDestination, TransportFOLSlab, TransportItem, TransportDepotRow, ImportJob, BackgroundJob
+from .utils import generate_dealer_code, fmt_km
+from django.db import models, transaction
+from django.db.models import Q, OuterRef, Subquery, Prefetch
 
 class PlaceSerializer(serializers.ModelSerializer):
     destination_name = serializers.CharField(source="destination.name", read_only=True)
@@ -35,6 +35,34 @@ class DealerSerializer(serializers.ModelSerializer):
         fields = '__all__'
         
 
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    # status of the queue entry: QUEUED means no run_jobs worker has picked it up yet
+    job_status = serializers.CharField(source="job.status", read_only=True, default=None)
+
+    class Meta:
+        model = ImportJob
+        exclude = ["file_path"]
+
+
+class BackgroundJobSerializer(serializers.ModelSerializer):
+    # imports are submitted through /dealers/import_excel/?stream=1 (needs the upload)
+    SUBMITTABLE_KINDS = ["DESTINATION_ENTRY_PDF", "SERVICE_BILL_PDF"]
+
+    class Meta:
+        model = BackgroundJob
+        exclude = ["result_path"]
+        read_only_fields = ["status", "result", "error", "created_at", "started_at", "finished_at"]
+
+    def validate(self, data):
+        if data["kind"] not in self.SUBMITTABLE_KINDS:
+            raise serializers.ValidationError({"kind": f"Only {self.SUBMITTABLE_KINDS} can be submitted"})
+
+        payload = data.get("payload") or {}
+        if not isinstance(payload.get("id"), int):
+            raise serializers.ValidationError({"payload": "payload.id (integer) is required"})
+        return data
+
      
 class RateRangeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -184,7 +212,48 @@ class DestinationSerializer(serializers.ModelSerializer):
 
         return destination
 
+class PreloadedDealerField(serializers.PrimaryKeyRelatedField):
+    """
+    Dealer FK that resolves from context["dealers"] (filled with one query by
+    DestinationEntryWriteSerializer) before falling back to a lookup per row.
+    """
+    def to_internal_value(self, data):
+        dealers = self.context.get("dealers") or {}
+        try:
+            return dealers[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+class PreloadedRateRangeField(serializers.PrimaryKeyRelatedField):
+    """
+    RateRange FK resolved from context["rate_ranges"], read from the
+    database with one query by DestinationEntryWriteSerializer. Not from
+    the rate range index: a range deleted in another worker stays in its
+    copy for up to RATE_RANGE_INDEX_TTL and the insert would then fail on
+    the foreign key instead of a 400.
+    """
+    def to_internal_value(self, data):
+        rate_ranges = self.context.get("rate_ranges") or {}
+        try:
+            return rate_ranges[int(data)]
+        except (KeyError, TypeError, ValueError):
+            return super().to_internal_value(data)
+
+
+# DealerEntry text columns UppercaseMixin.save() uppercases
+DEALER_ENTRY_UPPERCASE_FIELDS = [
+    f.name
+    for f in DealerEntry._meta.fields
+    if isinstance(f, (models.CharField, models.TextField)) and f.name not in DealerEntry.UPPERCASE_EXCLUDE
+]
+
+
 class DealerEntrySerializer(serializers.ModelSerializer):
+    # optional on write: present = update that row, missing = new row
+    id = serializers.IntegerField(required=False)
+    dealer = PreloadedDealerField(queryset=Dealer.objects.all(), allow_null=True, required=False)
+
     class Meta:
         model = DealerEntry
         fields = [
@@ -193,19 +262,30 @@ class DealerEntrySerializer(serializers.ModelSerializer):
             "no_bags", "rate", "mt", "mtk", "amount",
             "mda_number", "date", "description", "remarks", "bill_doc",
         ]
-        read_only_fields = ["id"]
-        
+
+    def validate(self, attrs):
+        # rows are bulk written and summarized from this data, so make it
+        # what DealerEntry() + UppercaseMixin.save() would store
+        attrs.setdefault("description", DealerEntry._meta.get_field("description").get_default())
+        for field in DEALER_ENTRY_UPPERCASE_FIELDS:
+            if isinstance(attrs.get(field), str):
+                attrs[field] = attrs[field].upper()
+        return attrs
+
 class TransportItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = TransportItem
         fields = ['id', 'name', 'description']
 
 class RangeEntryWriteSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    rate_range = PreloadedRateRangeField(queryset=RateRange.objects.all(), allow_null=True, required=False)
     dealer_entries = DealerEntrySerializer(many=True)
 
     class Meta:
         model = RangeEntry
         fields = [
+            "id",
             "rate_range",
             "rate",
             "print_page_no",
@@ -238,18 +318,14 @@ class DestinationEntrySerializer(serializers.ModelSerializer):
             "bill_number",
             "products",
             "rate_ranges",
+            "total_mt",
+            "total_amount",
             "service_bill",
         ]
 
+    # products / rate_ranges are read from the summary columns on the entry
     def get_rate_ranges(self, obj):
-        labels = []
-        for re in obj.range_entries.select_related("rate_range").all():
-            rr = re.rate_range
-            if rr:
-                from_km = int(rr.from_km) if rr.from_km.is_integer() else rr.from_km
-                to_km = int(rr.to_km) if rr.to_km.is_integer() else rr.to_km
-                labels.append(f"{from_km}-{to_km}")
-        return labels
+        return obj.rate_ranges_summary.splitlines()
 
     def get_service_bill(self, obj):
         if obj.service_bill:
@@ -257,12 +333,71 @@ class DestinationEntrySerializer(serializers.ModelSerializer):
         return None
     
     def get_products(self, obj):
-        products = set()
-        for de in obj.range_entries.prefetch_related("dealer_entries").all():
-            for entry in de.dealer_entries.all():
-                if entry.description:
-                    products.add(entry.description)
-        return list(products)
+        return obj.products_summary.splitlines()
+
+
+def summarize_ranges(ranges_data):
+    """
+    Summary columns of a DestinationEntry computed from the validated
+    range_entries payload (no queries).
+    """
+    products = set()
+    labels = []
+    total_mt = 0
+    total_amount = 0
+
+    for r in ranges_data:
+        rr = r.get("rate_range")
+        if rr:
+            labels.append(f"{fmt_km(rr.from_km)}-{fmt_km(rr.to_km)}")
+
+        total_mt += r.get("total_mt") or 0
+        total_amount += r.get("total_amount") or 0
+
+        for d in r.get("dealer_entries", []):
+            if d.get("description"):
+                products.add(d["description"])
+
+    return {
+        "products_summary": "\n".join(sorted(products)),
+        "rate_ranges_summary": "\n".join(labels),
+        "total_mt": total_mt,
+        "total_amount": total_amount,
+    }
+
+
+# entries rewritten per UPDATE when a RateRange edit refreshes their labels
+SUMMARY_REFRESH_BATCH_SIZE = 500
+
+
+def refresh_rate_ranges_summary(destination_entry_ids):
+    """
+    Rebuild rate_ranges_summary of the given entries from their stored
+    range entries, e.g. after a RateRange's from_km / to_km changed.
+    """
+    ids = list(dict.fromkeys(destination_entry_ids))
+
+    for i in range(0, len(ids), SUMMARY_REFRESH_BATCH_SIZE):
+        chunk = ids[i:i + SUMMARY_REFRESH_BATCH_SIZE]
+        labels = {entry_id: [] for entry_id in chunk}
+
+        rows = (
+            RangeEntry.objects
+            .filter(destination_entry_id__in=chunk, rate_range__isnull=False)
+            .order_by("id")
+            .values_list("destination_entry_id", "rate_range__from_km", "rate_range__to_km")
+        )
+        for entry_id, from_km, to_km in rows:
+            labels[entry_id].append(f"{fmt_km(from_km)}-{fmt_km(to_km)}")
+
+        DestinationEntry.objects.bulk_update(
+            [
+                DestinationEntry(id=entry_id, rate_ranges_summary="\n".join(entry_labels))
+                for entry_id, entry_labels in labels.items()
+            ],
+            ["rate_ranges_summary"],
+        )
+
 
 class DestinationEntryWriteSerializer(serializers.ModelSerializer):
     range_entries = RangeEntryWriteSerializer(many=True)
@@ -278,38 +413,159 @@ class DestinationEntryWriteSerializer(serializers.ModelSerializer):
             "range_entries",
         ]
 
+    def to_internal_value(self, data):
+        # resolve every dealer and rate range FK in the payload with one query each
+        dealer_ids, rate_range_ids = set(), set()
+        for r in data.get("range_entries") or [] if isinstance(data, dict) else []:
+            try:
+                rate_range_ids.add(int(r.get("rate_range")))
+            except (AttributeError, TypeError, ValueError):
+                pass
+            for d in r.get("dealer_entries") or [] if isinstance(r, dict) else []:
+                try:
+                    dealer_ids.add(int(d.get("dealer")))
+                except (AttributeError, TypeError, ValueError):
+                    pass
+        self.context["dealers"] = Dealer.objects.in_bulk(dealer_ids)
+        self.context["rate_ranges"] = RateRange.objects.in_bulk(rate_range_ids)
+        return super().to_internal_value(data)
+
+    @transaction.atomic
     def create(self, validated_data):
         ranges_data = validated_data.pop("range_entries")
-        dest_entry = DestinationEntry.objects.create(**validated_data)
+        dest_entry = DestinationEntry.objects.create(
+            **validated_data,
+            **summarize_ranges(ranges_data),
+        )
         self._create_ranges(dest_entry, ranges_data)
         return dest_entry
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         for field in ["destination", "letter_note", "bill_number", "date", "to_address"]:
             setattr(instance, field, validated_data.get(field, getattr(instance, field)))
+        for field, value in summarize_ranges(validated_data.get("range_entries", [])).items():
+            setattr(instance, field, value)
         instance.save()
 
-        # Clear & recreate child objects
-        instance.range_entries.all().delete()
-        self._create_ranges(instance, validated_data.get("range_entries", []))
+        self._sync_ranges(instance, validated_data.get("range_entries", []))
         return instance
 
     # --------------------------------
     # INTERNAL HELPER (NO DUPLICATION)
     # --------------------------------
     def _create_ranges(self, dest_entry, ranges_data):
+        """
+        One bulk_create for all ranges (ids come back via RETURNING) and one
+        for all their dealer entries. RangeEntry.save() is skipped, so its
+        full_clean() checks run in memory first.
+        """
+        range_entries = []
+        dealer_entries = []
+
         for r in ranges_data:
+            r.pop("id", None)
             dealer_entries_data = r.pop("dealer_entries")
 
-            range_entry = RangeEntry.objects.create(
-                destination_entry=dest_entry,
-                **r
-            )
+            range_entry = RangeEntry(destination_entry=dest_entry, **r)
+            _clean_range_entry(range_entry)
+            range_entries.append(range_entry)
+
+            for d in dealer_entries_data:
+                d.pop("id", None)
+                dealer_entries.append(DealerEntry(range_entry=range_entry, **d))
+
+        RangeEntry.objects.bulk_create(range_entries)
+
+        # range_entry_id is read when the objects are saved, after the
+        # ranges above got their pks
+        DealerEntry.objects.bulk_create(dealer_entries)
+
+    def _sync_ranges(self, dest_entry, ranges_data):
+        """
+        Diff the payload against the stored children instead of recreating
+        them. Rows are matched by id (ids from another entry count as new),
+        changed rows are bulk updated, new rows created and rows missing
+        from the payload deleted - so ids, print_page_no and the service
+        bill / depot links of untouched rows survive an edit.
+        """
+        existing_ranges = {r.id: r for r in dest_entry.range_entries.all()}
+        existing_dealers = {}
+        for d in DealerEntry.objects.filter(range_entry__destination_entry=dest_entry):
+            existing_dealers.setdefault(d.range_entry_id, {})[d.id] = d
+
+        new_ranges = []
+        changed_ranges, range_fields = [], set()
+        new_dealers = []
+        changed_dealers, dealer_fields = [], set()
+        stale_dealer_ids = []
+
+        for r in ranges_data:
+            range_entry = existing_ranges.pop(r.get("id"), None)
+            if range_entry is None:
+                new_ranges.append(r)
+                continue
+
+            dealer_entries_data = r.pop("dealer_entries")
+            r.pop("id")
+
+            changed = _apply_changes(range_entry, r)
+            if changed:
+                _clean_range_entry(range_entry)
+                changed_ranges.append(range_entry)
+                range_fields.update(changed)
+
+            dealers = existing_dealers.get(range_entry.id, {})
+            for d in dealer_entries_data:
+                dealer_entry = dealers.pop(d.pop("id", None), None)
+                if dealer_entry is None:
+                    new_dealers.append(DealerEntry(range_entry=range_entry, **d))
+                    continue
+
+                changed = _apply_changes(dealer_entry, d)
+                if changed:
+                    changed_dealers.append(dealer_entry)
+                    dealer_fields.update(changed)
 
-            DealerEntry.objects.bulk_create([
-                DealerEntry(range_entry=range_entry, **d)
-                for d in dealer_entries_data
-            ])
+            stale_dealer_ids.extend(dealers)
+
+        if existing_ranges:
+            RangeEntry.objects.filter(id__in=list(existing_ranges)).delete()
+        if stale_dealer_ids:
+            DealerEntry.objects.filter(id__in=stale_dealer_ids).delete()
+
+        if changed_ranges:
+            RangeEntry.objects.bulk_update(changed_ranges, sorted(range_fields))
+        if changed_dealers:
+            DealerEntry.objects.bulk_update(changed_dealers, sorted(dealer_fields))
+        DealerEntry.objects.bulk_create(new_dealers)
+
+        self._create_ranges(dest_entry, new_ranges)
+
+
+# FK fields skipped when validating RangeEntry in memory, the serializer has
+# already resolved them
+RANGE_ENTRY_FK_FIELDS = ["destination_entry", "rate_range", "fol_slab", "service_bill"]
+
+
+def _clean_range_entry(range_entry):
+    """What RangeEntry.save() does before writing, minus the FK lookups."""
+    range_entry._uppercase_fields()
+    range_entry.clean_fields(exclude=RANGE_ENTRY_FK_FIELDS)
+    range_entry.clean()
+
+
+def _apply_changes(obj, data):
+    """Copy changed values from validated data onto obj, return changed field names."""
+    changed = []
+    for field, value in data.items():
+        attname = obj._meta.get_field(field).attname
+        if isinstance(value, models.Model):
+            value = value.pk
+        if getattr(obj, attname) != value:
+            setattr(obj, attname, value)
+            changed.append(field)
+    return changed
 
 
 class DealerEntrySerializer(serializers.ModelSerializer):
@@ -378,12 +634,26 @@ class DestinationEntryDetailSerializer(serializers.ModelSerializer):
             "range_entries",
         ]
 
+def with_first_dealer(range_qs):
+    """
+    Annotate RangeEntry rows with km / description of their first dealer
+    line (lowest id, what dealer_entries.first() returns) as
+    first_dealer_km / first_dealer_product, in the same query.
+    """
+    first_dealer = DealerEntry.objects.filter(range_entry=OuterRef("pk")).order_by("id")
+    return range_qs.annotate(
+        first_dealer_km=Subquery(first_dealer.values("km")[:1]),
+        first_dealer_product=Subquery(first_dealer.values("description")[:1]),
+    )
+
+
 class TransportDepotRangeEntrySerializer(serializers.ModelSerializer):
+    """Expects a queryset passed through with_first_dealer()"""
     destination = serializers.CharField(
         source="destination_entry.destination.name",
         read_only=True
     )
-    product = serializers.SerializerMethodField()
+    product = serializers.CharField(source="first_dealer_product", read_only=True)
     destination_entry_id = serializers.IntegerField(
         source="destination_entry.id",
         read_only=True
@@ -394,7 +664,7 @@ class TransportDepotRangeEntrySerializer(serializers.ModelSerializer):
         read_only=True
     )
 
-    km = serializers.SerializerMethodField()
+    km = serializers.FloatField(source="first_dealer_km", read_only=True)
     mt_km = serializers.FloatField(
         source="total_mtk",
         read_only=True
@@ -417,13 +687,39 @@ class TransportDepotRangeEntrySerializer(serializers.ModelSerializer):
             "product",      # Products
         ]
         
-    def get_km(self, obj):
-        return obj.dealer_entries.first().km
-    def get_product(self, obj):
-        return obj.dealer_entries.first().description
         
 
 
+def depot_range_entries(range_qs):
+    """Ranges that belong in a bill's depot section"""
+    return range_qs.filter(
+        Q(destination_entry__transport_type="TRANSPORT_DEPOT")
+        | Q(destination_entry__destination__is_garage=True)
+    )
+
+
+def service_bill_read_queryset(qs=None):
+    """
+    Bills with every relation ServiceBillSerializer reads, so serializing a
+    page of bills runs the same handful of queries whatever its size.
+    Depot ranges land on bill.depot_range_entries.
+    """
+    if qs is None:
+        qs = ServiceBill.objects.all()
+    return qs.select_related(
+        "handling",
+        "transport_depot",
+        "transport_fol",
+    ).prefetch_related(
+        "transport_fol__slabs__destinations",
+        Prefetch(
+            "range_entries",
+            queryset=depot_range_entries(RangeEntry.objects.only("id", "service_bill_id")),
+            to_attr="depot_range_entries",
+        ),
+    )
+
+
 class HandlingSectionSerializer(serializers.ModelSerializer):
     
     class Meta:
@@ -452,18 +748,15 @@ class TransportDepotSectionSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         data = super().to_representation(instance)
 
-        # READ: compute entries dynamically
-        data["entries"] = list(
-            RangeEntry.objects
-            .filter(
-                Q(service_bill=instance.bill) &
-                (
-                    Q(destination_entry__transport_type="TRANSPORT_DEPOT")
-                    | Q(destination_entry__destination__is_garage=True)
-                )
+        # READ: compute entries dynamically, prefetched by service_bill_read_queryset
+        bill = instance.bill
+        if hasattr(bill, "depot_range_entries"):
+            data["entries"] = [r.id for r in bill.depot_range_entries]
+        else:
+            data["entries"] = list(
+                depot_range_entries(bill.range_entries.all())
+                .values_list("id", flat=True)
             )
-            .values_list("id", flat=True)
-        )
 
         return data
 
@@ -488,12 +781,9 @@ class TransportFOLSectionSerializer(serializers.ModelSerializer):
         data = super().to_representation(instance)
 
         slabs_data = []
-        slabs = (
-            instance.slabs
-            .prefetch_related("destinations")
-            .all()
-            .order_by("range_slab")
-        )
+        # .all() so prefetched slabs / destinations are used, sorted here
+        # instead of order_by() which would query again
+        slabs = sorted(instance.slabs.all(), key=lambda slab: slab.range_slab)
 
         for slab in slabs:
             slabs_data.append({
@@ -505,7 +795,7 @@ class TransportFOLSectionSerializer(serializers.ModelSerializer):
                 "destinations": [
                     {
                         "id": d.id,
-                        "destination_entry_id": d.destination_entry.id,
+                        "destination_entry_id": d.destination_entry_id,
                         "destination_place": d.destination_place,
                         "qty_mt": d.qty_mt,
                         "qty_mtk": d.qty_mtk,
@@ -524,17 +814,65 @@ class TransportFOLSectionSerializer(serializers.ModelSerializer):
         Collect UNIQUE destination_entry IDs
         used in this Transport FOL Section
         """
-        qs = (
-            TransportFOLDestination.objects
-            .filter(
-                fol_slab__fol_section=instance,
-                destination_entry__isnull=False
-            )
-            .values_list("destination_entry_id", flat=True)
-            .distinct()
+        ids = (
+            d.destination_entry_id
+            for slab in instance.slabs.all()
+            for d in slab.destinations.all()
+            if d.destination_entry_id is not None
         )
+        return list(dict.fromkeys(ids))
+
+# TransportDepotRow columns refreshed when a selected range already has a row
+# of this bill (never depot_section, ranges of other bills are rejected)
+DEPOT_ROW_UPSERT_FIELDS = ["destination", "product", "qty_mt", "km", "mt_km", "rate", "amount"]
+
+
+# values() columns behind the service bill list page
+SERVICE_BILL_SUMMARY_FIELDS = (
+    "id",
+    "bill_date",
+    "product",
+    "created_at",
+    "handling__bill_number",
+    "handling__total_qty",
+    "handling__total_bill_amount",
+    "transport_depot__bill_number",
+    "transport_depot__total_depot_qty",
+    "transport_depot__total_depot_amount",
+    "transport_fol__bill_number",
+    "transport_fol__grand_total_qty",
+    "transport_fol__grand_total_amount",
+)
+
+
+def service_bill_summaries(rows):
+    """
+    List page representation built from SERVICE_BILL_SUMMARY_FIELDS rows:
+    bill fields plus bill number and totals of each section (None when the
+    bill has no such section). No model instances, no nested serializers.
+    """
+    def section(r, prefix, qty, amount):
+        if r[f"{prefix}__bill_number"] is None:
+            return None
+        return {
+            "bill_number": r[f"{prefix}__bill_number"],
+            qty: r[f"{prefix}__{qty}"],
+            amount: r[f"{prefix}__{amount}"],
+        }
+
+    return [
+        {
+            "id": r["id"],
+            "bill_date": r["bill_date"],
+            "product": r["product"],
+            "created_at": r["created_at"],
+            "handling": section(r, "handling", "total_qty", "total_bill_amount"),
+            "depot": section(r, "transport_depot", "total_depot_qty", "total_depot_amount"),
+            "fol": section(r, "transport_fol", "grand_total_qty", "grand_total_amount"),
+        }
+        for r in rows
+    ]
 
-        return list(qs)
 
 class ServiceBillSerializer(serializers.ModelSerializer):
     handling = HandlingSectionSerializer(required=False, allow_null=True)
@@ -572,6 +910,19 @@ class ServiceBillSerializer(serializers.ModelSerializer):
 
         depot_entries_ids = depot_data.pop("entries", [])
 
+        # a range is billed once; the upsert below would move another
+        # bill's row onto this one
+        taken = sorted(
+            TransportDepotRow.objects
+            .filter(range_entry_id__in=depot_entries_ids)
+            .exclude(depot_section__bill=bill)
+            .values_list("range_entry_id", flat=True)
+        )
+        if taken:
+            raise serializers.ValidationError({
+                "depot": {"entries": [f"Range entries already billed on another service bill: {taken}"]}
+            })
+
         depot_section, _ = TransportDepotSection.objects.update_or_create(
             bill=bill,
             defaults=depot_data
@@ -594,18 +945,23 @@ class ServiceBillSerializer(serializers.ModelSerializer):
             range_entry_id__in=depot_entries_ids
         ).delete()
         
-        # fetch selected ranges
-        ranges = (
-            RangeEntry.objects
-            .filter(id__in=depot_entries_ids)
-            .select_related(
-                "destination_entry",
-                "destination_entry__destination",
+        # fetch selected ranges, with product / km of their first dealer line
+        ranges = list(
+            with_first_dealer(RangeEntry.objects.filter(id__in=depot_entries_ids))
+            .values(
+                "id",
+                "destination_entry_id",
+                "destination_entry__destination_id",
+                "first_dealer_product",
+                "first_dealer_km",
+                "total_mt",
+                "total_mtk",
+                "rate",
+                "total_amount",
             )
-            .prefetch_related("dealer_entries")
         )
         
-        destination_entry_ids = {r.destination_entry_id for r in ranges}
+        destination_entry_ids = {r["destination_entry_id"] for r in ranges}
         
         DestinationEntry.objects.filter(
             service_bill=bill
@@ -623,22 +979,27 @@ class ServiceBillSerializer(serializers.ModelSerializer):
             transport_type="TRANSPORT_DEPOT"
         )
         
-        for r in ranges:
-            dealer = r.dealer_entries.first()
-
-            TransportDepotRow.objects.update_or_create(
-                depot_section=depot_section,
-                range_entry=r,
-                defaults={
-                    "destination": r.destination_entry.destination,
-                    "product": dealer.description if dealer else "",
-                    "qty_mt": r.total_mt,
-                    "km": dealer.km if dealer else 0,
-                    "mt_km": r.total_mtk,
-                    "rate": r.rate,
-                    "amount": r.total_amount,
-                }
-            )
+        # one upsert keyed on the unique range_entry instead of
+        # update_or_create per row
+        TransportDepotRow.objects.bulk_create(
+            [
+                TransportDepotRow(
+                    depot_section=depot_section,
+                    range_entry_id=r["id"],
+                    destination_id=r["destination_entry__destination_id"],
+                    product=r["first_dealer_product"] or "",
+                    qty_mt=r["total_mt"],
+                    km=r["first_dealer_km"] or 0,
+                    mt_km=r["total_mtk"],
+                    rate=r["rate"],
+                    amount=r["total_amount"],
+                )
+                for r in ranges
+            ],
+            update_conflicts=True,
+            unique_fields=["range_entry"],
+            update_fields=DEPOT_ROW_UPSERT_FIELDS,
+        )
 
     def _sync_fol(self, bill, fol_data):
         if fol_data is None:
@@ -656,38 +1017,107 @@ class ServiceBillSerializer(serializers.ModelSerializer):
             }
         )
 
-        # unlink old destination entries
-        DestinationEntry.objects.filter(
-            transport_fol_destinations__fol_slab__fol_section=fol_section
-        ).update(
-            service_bill=None,
-            transport_type=None
-        )
-
-        # clear old slabs
-        fol_section.slabs.all().delete()
-
-        # recreate slabs + destinations
-        for slab in fol_slabs:
-            destinations = slab.pop("destinations", [])
+        # diff against the stored slabs (matched by range_slab) and their
+        # destinations (matched by id, or by destination entry when the
+        # payload row has no id) instead of recreating
+        existing_slabs = {
+            slab.range_slab: slab
+            for slab in fol_section.slabs.prefetch_related("destinations")
+        }
+        old_entry_ids = {
+            d.destination_entry_id
+            for slab in existing_slabs.values()
+            for d in slab.destinations.all()
+        }
 
-            fol_slab = TransportFOLSlab.objects.create(
-                fol_section=fol_section,
-                **slab
-            )
+        new_slabs = []
+        changed_slabs, slab_fields = [], set()
+        new_destinations = []
+        changed_destinations, destination_fields = [], set()
+        stale_destination_ids = []
+        new_entry_ids = set()
+
+        for slab_data in fol_slabs:
+            destinations = slab_data.pop("destinations", [])
+
+            fol_slab = existing_slabs.pop(slab_data.get("range_slab"), None)
+            if fol_slab is None:
+                fol_slab = TransportFOLSlab(fol_section=fol_section, **slab_data)
+                new_slabs.append(fol_slab)
+                existing_dests = {}
+                dest_ids_by_entry = {}
+            else:
+                changed = _apply_changes(fol_slab, slab_data)
+                if changed:
+                    changed_slabs.append(fol_slab)
+                    slab_fields.update(changed)
+                # rows whose entry was deleted (SET_NULL) are only reachable by id
+                existing_dests = {d.id: d for d in fol_slab.destinations.all()}
+                dest_ids_by_entry = {
+                    d.destination_entry_id: d.id
+                    for d in existing_dests.values()
+                    if d.destination_entry_id is not None
+                }
 
             for dest in destinations:
-                TransportFOLDestination.objects.create(
-                    fol_slab=fol_slab,
-                    **dest
-                )
+                dest_id = dest.pop("id", None)
+                if isinstance(dest.get("destination_place"), str):
+                    # what UppercaseMixin.save() would do
+                    dest["destination_place"] = dest["destination_place"].upper()
+
+                new_entry_ids.add(dest.get("destination_entry_id"))
+
+                if dest_id is None:
+                    dest_id = dest_ids_by_entry.get(dest.get("destination_entry_id"))
+                fol_dest = existing_dests.pop(dest_id, None)
+                if fol_dest is None:
+                    new_destinations.append(TransportFOLDestination(fol_slab=fol_slab, **dest))
+                    continue
+
+                changed = _apply_changes(fol_dest, dest)
+                if changed:
+                    changed_destinations.append(fol_dest)
+                    destination_fields.update(changed)
+
+            stale_destination_ids.extend(d.id for d in existing_dests.values())
+
+        # slabs left over are gone from the payload, their destinations cascade
+        if existing_slabs:
+            TransportFOLSlab.objects.filter(
+                id__in=[slab.id for slab in existing_slabs.values()]
+            ).delete()
+        if stale_destination_ids:
+            TransportFOLDestination.objects.filter(id__in=stale_destination_ids).delete()
+
+        if changed_slabs:
+            TransportFOLSlab.objects.bulk_update(changed_slabs, sorted(slab_fields))
+        if changed_destinations:
+            TransportFOLDestination.objects.bulk_update(changed_destinations, sorted(destination_fields))
+
+        # slabs get their pks first, fol_slab_id is read when the
+        # destinations are saved
+        TransportFOLSlab.objects.bulk_create(new_slabs)
+        TransportFOLDestination.objects.bulk_create(new_destinations)
+
+        new_entry_ids.discard(None)
+        old_entry_ids.discard(None)
+
+        # unlink entries dropped from the bill, link the selected ones
+        if old_entry_ids - new_entry_ids:
+            DestinationEntry.objects.filter(
+                id__in=old_entry_ids - new_entry_ids
+            ).update(
+                service_bill=None,
+                transport_type=None
+            )
 
-                DestinationEntry.objects.filter(
-                    id=dest["destination_entry_id"]
-                ).update(
-                    service_bill=bill,
-                    transport_type="TRANSPORT_FOL"
-                )
+        if new_entry_ids:
+            DestinationEntry.objects.filter(
+                id__in=new_entry_ids
+            ).update(
+                service_bill=bill,
+                transport_type="TRANSPORT_FOL"
+            )
 
     # =========================
     # CREATE
@@ -727,14 +1157,21 @@ class ServiceBillSerializer(serializers.ModelSerializer):
         return instance
 
     def to_representation(self, instance):
-        instance = (
-            ServiceBill.objects
-            .select_related("handling", "transport_depot", "transport_fol")
-            .prefetch_related(
-                "transport_fol__slabs",
-                "transport_fol__slabs__destinations"
-            )
-            .get(pk=instance.pk)
-        )
+        # list / retrieve hand in bills from service_bill_read_queryset;
+        # anything else (e.g. a bill just saved) is loaded fresh the same way
+        if not hasattr(instance, "depot_range_entries"):
+            instance = service_bill_read_queryset().get(pk=instance.pk)
         return super().to_representation(instance)
-    
\ No newline at end of file
+    
+
+class ServiceBillExportSerializer(serializers.Serializer):
+    """Body of POST /service-bills/export-pdfs/"""
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, required=False)
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    format = serializers.ChoiceField(choices=["pdf", "zip"], default="pdf")
+
+    def validate(self, attrs):
+        if not (attrs.get("ids") or attrs.get("date_from") or attrs.get("date_to")):
+            raise serializers.ValidationError("ids or a date range is required")
+        return attrs
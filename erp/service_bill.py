@@ -3,8 +3,6 @@ from reportlab.platypus import (
     Spacer, PageBreak
 )
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT
 from reportlab.lib import colors
 from num2words import num2words
 
@@ -16,42 +14,17 @@ from erp.models import (
     TransportDepotSection,
     TransportFOLSection,
 )
-from io import BytesIO
 from reportlab.platypus.flowables import HRFlowable
 from erp.models import DealerEntry
 from django.db.models import Q
 from collections import defaultdict
 from datetime import datetime
 
-
-styles = getSampleStyleSheet()
-
-HEADER = ParagraphStyle(
-    "HEADER",
-    fontSize=12,
-    alignment=TA_CENTER,
-    spaceAfter=6,
-    leading=12,
-)
-
-RIGHT = ParagraphStyle(
-    "RIGHT",
-    fontSize=11,
-    alignment=TA_RIGHT,
-)
-
-NORMAL = ParagraphStyle(
-    "NORMAL",
-    fontSize=11,
-    leading=12,
-    linespacing=4,
-)
-
-BOLD = ParagraphStyle(
-    "BOLD",
-    fontSize=11,
-    leading=12,
-    fontName="Helvetica-Bold",
+from .pdf_templates import (
+    pdf_output,
+    HEADER, RIGHT, NORMAL, BOLD,
+    BILL_COMPANY_HEADER, FACT_GST, WESTHILL_RH, CLEARING_BOX_TITLE, CLEARING_BOX_STYLE,
+    BANK_DETAILS, ACKNOWLEDGEMENT, SIGN_OFF, HANDLING_SIGN_OFF,
 )
 
 
@@ -59,21 +32,95 @@ BOLD = ParagraphStyle(
 # Common Header
 # --------------------------------------------------
 def build_company_header(story):
-    story.append(Paragraph(
-        "<b>M/S. SHAN ENTERPRISES</b><br/>"
-        "GST32ACNFS8060K1ZP<br/>"
-        "Clearing &amp; Transporting Contractor<br/>"
-        "21/4185 C, Meenchanda Rly. Gate<br/>"
-        "P.O. Arts College Calicut – 673018<br/>"
-        "Mob: 9447004108",
-        ParagraphStyle(
-            "company",
-            fontSize=12,
-            leading=15,
-        )
-    ))
+    story.append(BILL_COMPANY_HEADER)
     story.append(Spacer(1, 5))
 
+
+def build_clearing_box(bill, width):
+    return Table(
+        [
+            [CLEARING_BOX_TITLE],
+            [Paragraph(datetime.strptime(bill.date_of_clearing, '%Y-%m-%d').strftime('%d-%m-%Y') or "", NORMAL)],
+        ],
+        colWidths=[width],
+        rowHeights=[22, 22],
+        style=CLEARING_BOX_STYLE,
+    )
+
+
+def build_hsn_row(story, bill):
+    story.append(Table(
+        [[
+            Paragraph(f"<b>HSN/SAC CODE : {bill.hsn_code}</b>", NORMAL),
+            Paragraph(f"<b>YEAR : {bill.year}</b>", RIGHT),
+        ]],
+        colWidths=[260, 260],
+    ))
+    story.append(Spacer(1, 6))
+
+
+def build_payment_block(story, sign_off=SIGN_OFF):
+    """Bank details, acknowledgement and sign off under the claim line"""
+    story.append(Spacer(1, 10))
+    story.append(BANK_DETAILS)
+    story.append(Spacer(1, 8))
+    story.append(ACKNOWLEDGEMENT)
+    story.append(Spacer(1, 14))
+    story.append(sign_off)
+
+
+def build_transport_header(story, bill, bill_number, title):
+    """Letterhead shared by the depot and FOL sections, down to the HSN row"""
+    build_company_header(story)
+
+    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
+    story.append(Spacer(1, 2))
+    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
+    story.append(Spacer(1, 8))
+
+    # --------------------------------------------------
+    # BILL NO + DATE
+    # --------------------------------------------------
+    header_tbl = Table(
+        [[
+            Paragraph(f"<b>BILL NO :</b> {bill_number}", NORMAL),
+            Paragraph(f"<b>Date :</b> {bill.bill_date.strftime('%d-%m-%Y')}", RIGHT),
+        ]],
+        colWidths=[275, 260],
+    )
+    story.append(header_tbl)
+    story.append(Spacer(1, 8))
+
+    # --------------------------------------------------
+    # TO + REF (LEFT) | DATE OF CLEARING (RIGHT)
+    # --------------------------------------------------
+    left_block = [
+        Paragraph("<b>TO</b>", NORMAL),
+        Paragraph(bill.to_address.replace("\n", "<br/>"), NORMAL),
+        Spacer(1, 6),
+        Paragraph(f"Ref :- {bill.letter_note}", NORMAL),
+    ]
+
+    left_tbl = Table([[left_block]], colWidths=[360])
+
+    story.append(Table([[left_tbl, build_clearing_box(bill, 140)]], colWidths=[360, 140]))
+    story.append(Spacer(1, 10))
+
+    # --------------------------------------------------
+    # GST + PRODUCT
+    # --------------------------------------------------
+    story.append(FACT_GST)
+    story.append(Spacer(1, 6))
+    story.append(Paragraph(f"<b>PRODUCT : {bill.product}</b>", NORMAL))
+    story.append(WESTHILL_RH)
+    story.append(Spacer(1, 8))
+
+    # --------------------------------------------------
+    # SECTION TITLE
+    # --------------------------------------------------
+    story.append(Paragraph(title, HEADER))
+    build_hsn_row(story, bill)
+
 # --------------------------------------------------
 # HANDLING SECTION
 # --------------------------------------------------
@@ -165,23 +212,8 @@ def build_handling_section(story, bill: ServiceBill):
     ]))
 
     
-    clearing_box = Table(
-        [
-            [Paragraph("<b>Date of Clearing</b>", NORMAL)],
-            [Paragraph(datetime.strptime(bill.date_of_clearing, '%Y-%m-%d').strftime('%d-%m-%Y') or "", NORMAL)],
-        ],
-        colWidths=[130],
-        rowHeights=[22, 22],
-    )
-
-    clearing_box.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.7, colors.black),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-    ]))
-
     combo = Table(
-        [[qty_table, clearing_box]],
+        [[qty_table, build_clearing_box(bill, 130)]],
         colWidths=[360, 140],
     )
     story.append(combo)
@@ -189,23 +221,13 @@ def build_handling_section(story, bill: ServiceBill):
     # --------------------------------------------------
     # GST + PRODUCT BLOCK
     # --------------------------------------------------
-    story.append(Paragraph(
-        "<b>FACT GST 32AAACT6204C1Z2</b>",
-        ParagraphStyle(
-            "factgst",
-            alignment=TA_CENTER,
-            fontSize=9
-        )
-    ))
+    story.append(FACT_GST)
     story.append(Spacer(1, 6))
     story.append(Paragraph(
         f"<b>PRODUCT : {bill.product}</b>",
         NORMAL
     ))
-    story.append(Paragraph(
-        "<b>WESTHILL RH</b>",
-        NORMAL
-    ))
+    story.append(WESTHILL_RH)
     story.append(Spacer(1, 8))
 
     # --------------------------------------------------
@@ -215,16 +237,7 @@ def build_handling_section(story, bill: ServiceBill):
         "<b>TAX BILL OF HANDLING SERVICES</b>",
         HEADER
     ))
-    hsn_tbl = Table(
-        [[
-            Paragraph(f"<b>HSN/SAC CODE : {bill.hsn_code}</b>", NORMAL),
-            Paragraph(f"<b>YEAR : {bill.year}</b>", RIGHT),
-        ]],
-        colWidths=[260, 260],
-    )
-
-    story.append(hsn_tbl)
-    story.append(Spacer(1, 6))
+    build_hsn_row(story, bill)
 
     # --------------------------------------------------
     # TAX TABLE
@@ -289,31 +302,7 @@ def build_handling_section(story, bill: ServiceBill):
         f"({words} only) For Clearing &amp; Transportation Bill of Fertilizer.",
         NORMAL
     ))
-    story.append(Spacer(1, 10))
-
-    story.append(Paragraph(
-        "Kindly arrange payment to M/S. Shan Enterprises, through IFSC NO.<br/>"
-        "CNRB0014404 – A/C. No.44041400000041 "
-        "Canara Bank, Panniyankara, Calicut.",
-        NORMAL
-    ))
-    story.append(Spacer(1, 8))
-
-    story.append(Paragraph(
-        "Acknowledge copies of Delivery advice attached with this bill<br/>"
-        "I request you to approve this bill and payment may be made at an early date",
-        NORMAL
-    ))
-    story.append(Spacer(1, 14))
-    
-    footer_tbl = Table(
-        [[
-            Paragraph("Thanking you", NORMAL),
-            Paragraph("Yours faithfully &nbsp; &nbsp; &nbsp;", RIGHT),
-        ]],
-        colWidths=[286, 260],
-    )
-    story.append(footer_tbl)
+    build_payment_block(story, HANDLING_SIGN_OFF)
 
 
     story.append(PageBreak())
@@ -326,92 +315,10 @@ def build_handling_section(story, bill: ServiceBill):
 def build_depot_section(story, bill: ServiceBill):
     depot = bill.transport_depot
     
-    rows = depot.rows.select_related("destination")
+    # prefetched with their destinations by service_bill_pdf_queryset
+    rows = depot.rows.all()
 
-    # --------------------------------------------------
-    # HEADER (same as handling)
-    # --------------------------------------------------
-    build_company_header(story)
-
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
-    story.append(Spacer(1, 2))
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
-    story.append(Spacer(1, 8))
-
-    # --------------------------------------------------
-    # BILL NO + DATE
-    # --------------------------------------------------
-    header_tbl = Table(
-        [[
-            Paragraph(f"<b>BILL NO :</b> {depot.bill_number}", NORMAL),
-            Paragraph(f"<b>Date :</b> {bill.bill_date.strftime('%d-%m-%Y')}", RIGHT),
-        ]],
-        colWidths=[275, 260],
-    )
-    story.append(header_tbl)
-    story.append(Spacer(1, 8))
-
-    # --------------------------------------------------
-    # TO + REF (LEFT) | DATE OF CLEARING (RIGHT)
-    # --------------------------------------------------
-    left_block = [
-        Paragraph("<b>TO</b>", NORMAL),
-        Paragraph(bill.to_address.replace("\n", "<br/>"), NORMAL),
-        Spacer(1, 6),
-        Paragraph(f"Ref :- {bill.letter_note}", NORMAL),
-    ]
-
-    left_tbl = Table([[left_block]], colWidths=[360])
-
-    clearing_box = Table(
-        [
-            [Paragraph("<b>Date of Clearing</b>", NORMAL)],
-            [Paragraph(datetime.strptime(bill.date_of_clearing, '%Y-%m-%d').strftime('%d-%m-%Y') or "", NORMAL)],
-        ],
-        colWidths=[140],
-        rowHeights=[22, 22],
-    )
-
-    clearing_box.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.7, colors.black),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-    ]))
-
-    combo = Table(
-        [[left_tbl, clearing_box]],
-        colWidths=[360, 140],
-    )
-    story.append(combo)
-    story.append(Spacer(1, 10))
-
-    # --------------------------------------------------
-    # GST + PRODUCT
-    # --------------------------------------------------
-    story.append(Paragraph(
-        "<b>FACT GST 32AAACT6204C1Z2</b>",
-        ParagraphStyle("factgst", alignment=TA_CENTER, fontSize=9)
-    ))
-    story.append(Spacer(1, 6))
-
-    story.append(Paragraph(f"<b>PRODUCT : {bill.product}</b>", NORMAL))
-    story.append(Paragraph("<b>WESTHILL RH</b>", NORMAL))
-    story.append(Spacer(1, 8))
-
-    # --------------------------------------------------
-    # SECTION TITLE
-    # --------------------------------------------------
-    story.append(Paragraph("<b>TRANSPORTATION (DEPOT)</b>", HEADER))
-
-    hsn_tbl = Table(
-        [[
-            Paragraph(f"<b>HSN/SAC CODE : {bill.hsn_code}</b>", NORMAL),
-            Paragraph(f"<b>YEAR : {bill.year}</b>", RIGHT),
-        ]],
-        colWidths=[260, 260],
-    )
-    story.append(hsn_tbl)
-    story.append(Spacer(1, 6))
+    build_transport_header(story, bill, depot.bill_number, "<b>TRANSPORTATION (DEPOT)</b>")
 
     # --------------------------------------------------
     # DEPOT TABLE (Dealer Entries)
@@ -499,31 +406,7 @@ def build_depot_section(story, bill: ServiceBill):
         f"({words} only) For Clearing &amp; Transportation Bill of Fertilizer.",
         NORMAL
     ))
-    story.append(Spacer(1, 10))
-
-    story.append(Paragraph(
-        "Kindly arrange payment to M/S. Shan Enterprises, through IFSC NO.<br/>"
-        "CNRB0014404 – A/C. No.44041400000041 "
-        "Canara Bank, Panniyankara, Calicut.",
-        NORMAL
-    ))
-    story.append(Spacer(1, 8))
-
-    story.append(Paragraph(
-        "Acknowledge copies of Delivery advice attached with this bill<br/>"
-        "I request you to approve this bill and payment may be made at an early date",
-        NORMAL
-    ))
-    story.append(Spacer(1, 14))
-
-    footer_tbl = Table(
-        [[
-            Paragraph("Thanking you", NORMAL),
-            Paragraph("Yours faithfully", RIGHT),
-        ]],
-        colWidths=[286, 260],
-    )
-    story.append(footer_tbl)
+    build_payment_block(story)
 
     story.append(PageBreak())
 
@@ -537,81 +420,7 @@ def build_fol_section(story, bill: ServiceBill):
     
     rh_qty = fol.rh_qty or 0
 
-    # --------------------------------------------------
-    # HEADER (same as depot)
-    # --------------------------------------------------
-    build_company_header(story)
-
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
-    story.append(Spacer(1, 2))
-    story.append(HRFlowable(width="100%", thickness=1, color=colors.black))
-    story.append(Spacer(1, 8))
-
-    header_tbl = Table(
-        [[
-            Paragraph(f"<b>BILL NO :</b> {fol.bill_number}", NORMAL),
-            Paragraph(f"<b>Date :</b> {bill.bill_date.strftime('%d-%m-%Y')}", RIGHT),
-        ]],
-        colWidths=[275, 260],
-    )
-    story.append(header_tbl)
-    story.append(Spacer(1, 8))
-
-    # --------------------------------------------------
-    # TO + REF | DATE OF CLEARING
-    # --------------------------------------------------
-    left_block = [
-        Paragraph("<b>TO</b>", NORMAL),
-        Paragraph(bill.to_address.replace("\n", "<br/>"), NORMAL),
-        Spacer(1, 6),
-        Paragraph(f"Ref :- {bill.letter_note}", NORMAL),
-    ]
-
-    left_tbl = Table([[left_block]], colWidths=[360])
-
-    clearing_box = Table(
-        [
-            [Paragraph("<b>Date of Clearing</b>", NORMAL)],
-            [Paragraph(datetime.strptime(bill.date_of_clearing, '%Y-%m-%d').strftime('%d-%m-%Y') or "", NORMAL)],
-        ],
-        colWidths=[140],
-        rowHeights=[22, 22],
-    )
-    clearing_box.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.7, colors.black),
-        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-    ]))
-
-    story.append(Table([[left_tbl, clearing_box]], colWidths=[360, 140]))
-    story.append(Spacer(1, 10))
-
-    # --------------------------------------------------
-    # GST + PRODUCT
-    # --------------------------------------------------
-    story.append(Paragraph(
-        "<b>FACT GST 32AAACT6204C1Z2</b>",
-        ParagraphStyle("factgst", alignment=TA_CENTER, fontSize=9)
-    ))
-    story.append(Spacer(1, 6))
-    story.append(Paragraph(f"<b>PRODUCT : {bill.product}</b>", NORMAL))
-    story.append(Paragraph("<b>WESTHILL RH</b>", NORMAL))
-    story.append(Spacer(1, 8))
-
-    # --------------------------------------------------
-    # SECTION TITLE
-    # --------------------------------------------------
-    story.append(Paragraph("<b>TRANSPORTATION (FOL)</b>", HEADER))
-
-    hsn_tbl = Table(
-        [[
-            Paragraph(f"<b>HSN/SAC CODE : {bill.hsn_code}</b>", NORMAL),
-            Paragraph(f"<b>YEAR : {bill.year}</b>", RIGHT),
-        ]],
-        colWidths=[260, 260],
-    )
-    story.append(hsn_tbl)
-    story.append(Spacer(1, 6))
+    build_transport_header(story, bill, fol.bill_number, "<b>TRANSPORTATION (FOL)</b>")
 
     # --------------------------------------------------
     # TABLE HEADER
@@ -772,27 +581,7 @@ def build_fol_section(story, bill: ServiceBill):
         f"({words} only) For Clearing &amp; Transportation Bill of Fertilizer.",
         NORMAL
     ))
-
-    story.append(Spacer(1, 10))
-    story.append(Paragraph(
-        "Kindly arrange payment to M/S. Shan Enterprises, through IFSC NO.<br/>"
-        "CNRB0014404 – A/C. No.44041400000041 "
-        "Canara Bank, Panniyankara, Calicut.",
-        NORMAL
-    ))
-
-    story.append(Spacer(1, 8))
-    story.append(Paragraph(
-        "Acknowledge copies of Delivery advice attached with this bill<br/>"
-        "I request you to approve this bill and payment may be made at an early date",
-        NORMAL
-    ))
-
-    story.append(Spacer(1, 14))
-    story.append(Table(
-        [[Paragraph("Thanking you", NORMAL), Paragraph("Yours faithfully", RIGHT)]],
-        colWidths=[286, 260],
-    ))
+    build_payment_block(story)
 
     story.append(PageBreak())
 
@@ -800,16 +589,25 @@ def build_fol_section(story, bill: ServiceBill):
 # MAIN EXPORT FUNCTION
 # --------------------------------------------------
 
-def generate_service_bill_pdf(service_bill_id):
-    bill = ServiceBill.objects.select_related(
+def service_bill_pdf_queryset():
+    """Bills with every row the PDF reads, so rendering runs no queries"""
+    return ServiceBill.objects.select_related(
         "handling",
         "transport_depot",
         "transport_fol",
     ).prefetch_related(
-        "transport_fol__slabs__destinations"
-    ).get(id=service_bill_id)
+        "transport_depot__rows__destination",
+        "transport_fol__slabs__destinations",
+    )
+
+
+def generate_service_bill_pdf(service_bill_id):
+    bill = service_bill_pdf_queryset().get(id=service_bill_id)
+    return render_service_bill_pdf(bill)
+
 
-    buffer = BytesIO()
+def render_service_bill_pdf(bill):
+    buffer = pdf_output()
 
     doc = SimpleDocTemplate(
         buffer,
@@ -838,10 +636,10 @@ def generate_service_bill_pdf(service_bill_id):
     # SECTION 3 – TRANSPORT FOL
     # -------------------------------
     fol = getattr(bill, "transport_fol", None)
-    if fol and fol.slabs.exists():
+    if fol and fol.slabs.all():
         build_fol_section(elements, bill)
 
     doc.build(elements)
 
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
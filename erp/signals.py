@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import RateRange, RangeEntry, DestinationEntry, ServiceBill, Destination, Place, TransportItem, Dealer
+from .rate_index import invalidate_rate_range_index
+from . import pdf_cache
+from .reference_cache import bump_version
+
+
+@receiver([post_save, post_delete], sender=RateRange)
+def rate_range_changed(sender, **kwargs):
+    # rebuild only once the change is visible to other connections
+    transaction.on_commit(invalidate_rate_range_index)
+
+
+# DestinationEntry.rate_ranges_summary holds "from-to" labels copied at save
+# time, rebuild them for every entry that uses an edited / deleted range.
+# (serializers is imported in the receivers, it pulls in views via utils)
+@receiver(post_save, sender=RateRange)
+def rate_range_saved(sender, instance, created, **kwargs):
+    if created:
+        return
+    from .serializers import refresh_rate_ranges_summary
+
+    def refresh():
+        refresh_rate_ranges_summary(
+            RangeEntry.objects
+            .filter(rate_range_id=instance.pk)
+            .values_list("destination_entry_id", flat=True)
+        )
+    transaction.on_commit(refresh)
+
+
+@receiver(pre_delete, sender=RateRange)
+def rate_range_deleting(sender, instance, **kwargs):
+    from .serializers import refresh_rate_ranges_summary
+
+    # collected before SET_NULL clears the references
+    entry_ids = list(
+        RangeEntry.objects
+        .filter(rate_range_id=instance.pk)
+        .values_list("destination_entry_id", flat=True)
+        .distinct()
+    )
+    if entry_ids:
+        transaction.on_commit(lambda: refresh_rate_ranges_summary(entry_ids))
+
+
+# Cached PDFs are keyed by a hash of their rows, so a stale file is never
+# served; these only free the disk space of the superseded renders.
+@receiver([post_save, post_delete], sender=DestinationEntry)
+def destination_entry_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: pdf_cache.invalidate("destination-entry", instance.pk))
+
+
+@receiver([post_save, post_delete], sender=ServiceBill)
+def service_bill_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: pdf_cache.invalidate("service-bill", instance.pk))
+
+
+# Reference lists are cached until their model's version stamp changes.
+# Bulk inserts skip these, callers bump the stamp themselves.
+@receiver([post_save, post_delete], sender=RateRange)
+@receiver([post_save, post_delete], sender=Destination)
+@receiver([post_save, post_delete], sender=Place)
+@receiver([post_save, post_delete], sender=TransportItem)
+@receiver([post_save, post_delete], sender=Dealer)
+def reference_data_changed(sender, **kwargs):
+    transaction.on_commit(lambda: bump_version(sender))
+
+
+# dealer.places.add() / remove() / clear() change both the dealer and the
+# place lists but send no post_save
+@receiver(m2m_changed, sender=Dealer.places.through)
+def dealer_places_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(lambda: (bump_version(Dealer), bump_version(Place)))
@@ -1,3 +1,663 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from io import BytesIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openpyxl import Workbook
+from pypdf import PdfReader
+from rest_framework.test import APIClient
+
+from . import bill_export
+from .jobs import claim_next_job, enqueue, purge_job_results, requeue_stale_jobs, run_job
+from .models import BackgroundJob, Dealer, ImportJob, HandlingBillSection, Place, Destination, DestinationEntry, RangeEntry, RateRange, ServiceBill, TransportDepotRow, TransportFOLDestination, TransportFOLSlab
+from .print_data import load_destination_entry_print_data
+from .rate_index import get_rate_range_index
+
+
+class ApiTestCase(TestCase):
+    """TestCase with an authenticated DRF client in self.client"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="tester", password="secret")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+
+def entry_payload(destination, rate_ranges, dealers_per_range=2, transport_type=None):
+    """create-full payload: one range per rate range, `dealers_per_range` dealer lines each"""
+    return {
+        "destination": destination.id,
+        "bill_number": "TEST",
+        "date": "2025-01-01",
+        "transport_type": transport_type,
+        "range_entries": [
+            {
+                "rate_range": rr.id,
+                "rate": rr.rate,
+                "total_bags": dealers_per_range * 20,
+                "total_mt": dealers_per_range,
+                "total_mtk": dealers_per_range * 25,
+                "total_amount": dealers_per_range * 25 * rr.rate,
+                "dealer_entries": [
+                    {
+                        "despatched_to": "PLACE",
+                        "km": 25,
+                        "no_bags": 20,
+                        "rate": rr.rate,
+                        "mt": 1,
+                        "mtk": 25,
+                        "amount": 25 * rr.rate,
+                        "mda_number": f"MDA-{rr.id}-{j}",
+                        "date": "2025-01-01",
+                    }
+                    for j in range(dealers_per_range)
+                ],
+            }
+            for rr in rate_ranges
+        ],
+    }
+
+
+# --------------------------------------------------
+# DEALER EXCEL IMPORT
+# --------------------------------------------------
+
+def workbook_upload(sheets):
+    """.xlsx upload with one sheet per {sheet name: [row, ...]} item"""
+    wb = Workbook()
+    wb.remove(wb.active)
+    for name, rows in sheets.items():
+        ws = wb.create_sheet(name)
+        ws.append(["Customer No", "Name 1", "Mob No.", "Pincode", "Unloading Point", "Distance"])
+        for row in rows:
+            ws.append(row)
+
+    out = BytesIO()
+    wb.save(out)
+    return SimpleUploadedFile("dealers.xlsx", out.getvalue())
+
+
+class DealerImportTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.kannur = Destination.objects.create(name="KANNUR FOL", place="KANNUR")
+        self.talap = Place.objects.create(name="TALAP", distance=12, destination=self.kannur)
+        self.existing = Dealer.objects.create(code="D1", name="OLD NAME")
+
+    def places_of(self, code):
+        return set(
+            Dealer.objects.get(code=code).places.values_list("destination__place", "name")
+        )
+
+    def test_import(self):
+        upload = workbook_upload({
+            "KANNUR": [
+                ["d1", "NEW NAME", 9000000001, 670001, "TALAP", 99],    # existing dealer + place
+                ["D2", "DEALER 2", 9000000002, 670002, "Talap", 12],    # new dealer, existing place
+                ["D2", "DEALER 2", 9000000002, 670002, "CHALA", 8],     # new place
+                ["D3", "DEALER 3", 9000000003, 670003, "chala", 8],
+            ],
+            "KOZHIKODE": [
+                ["D1", "NEW NAME", 9000000001, 670001, "FEROKE", 5],    # new destination
+            ],
+        })
+        response = self.client.post("/api/dealers/import_excel/", {"file": upload}, format="multipart")
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["dealers_created"], 2)
+        self.assertEqual(response.data["places_created"], 2)
+        self.assertEqual(response.data["destinations_created"], 1)
+
+        self.assertEqual(self.places_of("D1"), {("KANNUR", "TALAP"), ("KOZHIKODE", "FEROKE")})
+        self.assertEqual(self.places_of("D2"), {("KANNUR", "TALAP"), ("KANNUR", "CHALA")})
+        self.assertEqual(self.places_of("D3"), {("KANNUR", "CHALA")})
+
+        # existing rows are linked, not overwritten
+        self.assertEqual(Dealer.objects.get(code="D1").name, "OLD NAME")
+        self.assertEqual(Place.objects.get(pk=self.talap.pk).distance, 12)
+        self.assertEqual(Place.objects.get(name="CHALA").distance, 8)
+
+    def test_reimport_creates_nothing(self):
+        rows = {"KANNUR": [["D2", "DEALER 2", 9000000002, 670002, "CHALA", 8]]}
+        self.client.post("/api/dealers/import_excel/", {"file": workbook_upload(rows)}, format="multipart")
+        response = self.client.post("/api/dealers/import_excel/", {"file": workbook_upload(rows)}, format="multipart")
+
+        self.assertEqual(response.data["dealers_created"], 0)
+        self.assertEqual(response.data["places_created"], 0)
+        self.assertEqual(Dealer.places.through.objects.count(), 1)
+
+
+# --------------------------------------------------
+# SERVICE BILL: TRANSPORT DEPOT
+# --------------------------------------------------
+
+class ServiceBillDepotSyncTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        destination = Destination.objects.create(name="KANNUR DEPOT", place="KANNUR")
+        entry = DestinationEntry.objects.create(destination=destination, bill_number="D-1", date="2025-01-01")
+        rate_range = RateRange.objects.create(from_km=0, to_km=50, rate=100)
+        self.ranges = [
+            RangeEntry.objects.create(destination_entry=entry, rate_range=rate_range, rate=100, total_mt=2, total_mtk=50, total_amount=5000)
+            for _ in range(2)
+        ]
+
+    def post_bill(self, bill_number, range_ids):
+        return self.client.post("/api/service-bills/", {
+            "date_of_clearing": "01-01-2025",
+            "depot": {"bill_number": bill_number, "entries": range_ids},
+        }, format="json")
+
+    def test_range_billed_on_another_bill_is_rejected(self):
+        first = self.post_bill("DEPOT/1", [self.ranges[0].id])
+        self.assertEqual(first.status_code, 201, first.data)
+
+        second = self.post_bill("DEPOT/2", [self.ranges[0].id, self.ranges[1].id])
+        self.assertEqual(second.status_code, 400)
+
+        # the first bill keeps its row, nothing of the second bill was saved
+        row = TransportDepotRow.objects.get()
+        self.assertEqual(row.depot_section.bill_id, first.data["id"])
+        self.assertEqual(row.range_entry_id, self.ranges[0].id)
+        self.assertEqual(ServiceBill.objects.count(), 1)
+        self.assertEqual(RangeEntry.objects.get(pk=self.ranges[1].pk).service_bill_id, None)
+
+    def test_resave_keeps_own_rows(self):
+        response = self.post_bill("DEPOT/1", [r.id for r in self.ranges])
+        self.assertEqual(response.status_code, 201, response.data)
+
+        url = f"/api/service-bills/{response.data['id']}/"
+        payload = {k: v for k, v in self.client.get(url).data.items() if v is not None}
+        response = self.client.put(url, payload, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(TransportDepotRow.objects.count(), 2)
+
+
+# --------------------------------------------------
+# SERVICE BILL: TRANSPORT FOL
+# --------------------------------------------------
+
+class ServiceBillFOLSyncTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        destination = Destination.objects.create(name="KANNUR FOL", place="KANNUR")
+        self.entries = [
+            DestinationEntry.objects.create(
+                destination=destination, bill_number=f"FOL-{i}", date="2025-01-01"
+            )
+            for i in range(2)
+        ]
+
+        response = self.client.post("/api/service-bills/", {
+            "date_of_clearing": "01-01-2025",
+            "fol": {
+                "bill_number": "FOL/1",
+                "rh_qty": 0,
+                "slabs": [{
+                    "range_slab": "0-50",
+                    "rate": 100,
+                    "destinations": [
+                        {
+                            "destination_entry_id": entry.id,
+                            "destination_place": "kannur",
+                            "qty_mt": 10,
+                            "qty_mtk": 250,
+                            "amount": 1000,
+                        }
+                        for entry in self.entries
+                    ],
+                }],
+            },
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        self.bill_id = response.data["id"]
+
+    def resave(self):
+        """PUT the bill's GET payload back unchanged"""
+        url = f"/api/service-bills/{self.bill_id}/"
+        payload = {k: v for k, v in self.client.get(url).data.items() if v is not None}
+        response = self.client.put(url, payload, format="json")
+        self.assertEqual(response.status_code, 200, response.data)
+
+    def test_resave_keeps_rows(self):
+        for _ in range(3):
+            self.resave()
+
+        self.assertEqual(TransportFOLSlab.objects.count(), 1)
+        self.assertEqual(TransportFOLDestination.objects.count(), 2)
+
+    def test_resave_keeps_rows_of_deleted_entry(self):
+        # the FK is SET_NULL, the row stays with destination_entry = NULL
+        self.entries[0].delete()
+
+        for _ in range(3):
+            self.resave()
+
+        self.assertEqual(TransportFOLDestination.objects.count(), 2)
+        self.assertEqual(
+            TransportFOLDestination.objects.filter(destination_entry__isnull=True).count(), 1
+        )
+        self.assertEqual(
+            DestinationEntry.objects.get(pk=self.entries[1].pk).service_bill_id, self.bill_id
+        )
+
+
+# --------------------------------------------------
+# DESTINATION ENTRY: SUMMARY COLUMNS
+# --------------------------------------------------
+
+class RateRangeSummaryTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.destination = Destination.objects.create(name="KANNUR", place="KANNUR")
+        self.near = RateRange.objects.create(from_km=0, to_km=50, rate=100)
+        self.far = RateRange.objects.create(from_km=51, to_km=75, rate=120)
+
+        response = self.client.post(
+            "/api/destination-entries/create-full/",
+            entry_payload(self.destination, [self.near, self.far]),
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def rate_ranges(self):
+        return self.client.get("/api/destination-entries/").data["results"][0]["rate_ranges"]
+
+    def test_labels_follow_rate_range_edit(self):
+        self.assertEqual(self.rate_ranges(), ["0-50", "51-75"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f"/api/rate-ranges/{self.far.id}/", {"to_km": 80}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.rate_ranges(), ["0-50", "51-80"])
+
+    def test_labels_drop_deleted_rate_range(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.near.delete()
+
+        self.assertEqual(self.rate_ranges(), ["51-75"])
+
+    def test_products_default_description(self):
+        # entry_payload sends no description, the model default is stored
+        entry = DestinationEntry.objects.get()
+        self.assertEqual(
+            set(RangeEntry.objects.values_list("dealer_entries__description", flat=True)), {"FACTOM FOS"}
+        )
+        self.assertEqual(entry.products_summary, "FACTOM FOS")
+
+        response = self.client.get("/api/destination-entries/transport-fol-unbilled/", {"item": "FACTOM"})
+        self.assertEqual([e["id"] for e in response.data], [entry.id])
+
+
+class DestinationEntryWriteTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.destination = Destination.objects.create(name="KANNUR", place="KANNUR")
+        self.rate_range = RateRange.objects.create(from_km=0, to_km=50, rate=100)
+
+    def test_dealer_lines_stored_uppercase(self):
+        payload = entry_payload(self.destination, [self.rate_range], dealers_per_range=1)
+        payload["range_entries"][0]["dealer_entries"][0].update(
+            despatched_to="feroke", mda_number="mda-1", description="urea", remarks="keep case"
+        )
+        response = self.client.post("/api/destination-entries/create-full/", payload, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+
+        entry = DestinationEntry.objects.get()
+        self.assertEqual(
+            list(RangeEntry.objects.values_list(
+                "dealer_entries__despatched_to", "dealer_entries__mda_number",
+                "dealer_entries__description", "dealer_entries__remarks",
+            )),
+            [("FEROKE", "MDA-1", "UREA", "keep case")],
+        )
+        self.assertEqual(entry.products_summary, "UREA")
+
+    def test_rate_range_deleted_elsewhere(self):
+        # this process still has the range in its index, as a worker that
+        # did not see the delete would
+        get_rate_range_index(refresh=True)
+        gone = RateRange.objects.create(from_km=51, to_km=100, rate=120)
+        get_rate_range_index(refresh=True)
+        RateRange.objects.filter(pk=gone.pk).delete()
+
+        payload = entry_payload(self.destination, [self.rate_range, gone], dealers_per_range=1)
+        response = self.client.post("/api/destination-entries/create-full/", payload, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("rate_range", response.data["range_entries"][1])
+        self.assertFalse(DestinationEntry.objects.exists())
+
+
+# --------------------------------------------------
+# DESTINATION ENTRY: QUERY COUNTS
+# --------------------------------------------------
+# Each endpoint is hit with a small and a full page; the query count must be
+# the same for both, i.e. it does not grow with the number of rows.
+
+class DestinationEntryQueryCountTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.destination = Destination.objects.create(name="KANNUR", place="KANNUR")
+        self.rate_ranges = [
+            RateRange.objects.create(from_km=i * 10, to_km=i * 10 + 9, rate=100 + i)
+            for i in range(10)
+        ]
+
+    def create_entries(self, n, n_ranges=2, transport_type=None):
+        ids = []
+        for _ in range(n):
+            response = self.client.post(
+                "/api/destination-entries/create-full/",
+                entry_payload(self.destination, self.rate_ranges[:n_ranges], transport_type=transport_type),
+                format="json",
+            )
+            self.assertEqual(response.status_code, 201, response.data)
+            ids.append(response.data["id"])
+        return ids
+
+    def test_list(self):
+        for n in (2, 10):
+            with self.subTest(page=n):
+                DestinationEntry.objects.all().delete()
+                ids = self.create_entries(n)
+                bill = ServiceBill.objects.create(date_of_clearing="01-01-2025")
+                DestinationEntry.objects.filter(id__in=ids[::2]).update(
+                    service_bill=bill, transport_type="TRANSPORT_DEPOT"
+                )
+                # COUNT(*) + page with destination / service bill joined
+                with self.assertNumQueries(2):
+                    response = self.client.get("/api/destination-entries/")
+                self.assertEqual(len(response.data["results"]), n)
+
+    def test_retrieve(self):
+        for n_ranges in (2, 10):
+            with self.subTest(ranges=n_ranges):
+                entry_id, = self.create_entries(1, n_ranges=n_ranges)
+                # entry + ranges + dealer lines
+                with self.assertNumQueries(3):
+                    response = self.client.get(f"/api/destination-entries/{entry_id}/")
+                self.assertEqual(len(response.data["range_entries"]), n_ranges)
+
+    def test_transport_fol_unbilled(self):
+        for n in (2, 10):
+            with self.subTest(entries=n):
+                DestinationEntry.objects.all().delete()
+                self.create_entries(n, transport_type="TRANSPORT_FOL")
+                with self.assertNumQueries(1):
+                    response = self.client.get("/api/destination-entries/transport-fol-unbilled/")
+                self.assertEqual(len(response.data), n)
+
+    # ---- destination entry PDF ----
+
+    def test_print_data_loader(self):
+        entry_id, = self.create_entries(1, n_ranges=10)
+        # entry + ranges + dealer lines
+        with self.assertNumQueries(3):
+            entry, ranges = load_destination_entry_print_data(entry_id)
+        self.assertEqual(len(ranges), 10)
+        self.assertTrue(all(len(rows) == 2 for _, rows in ranges))
+
+    def print_pdf(self, entry_id, queries, preview=False):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+
+        url = f"/api/destination-entries/{entry_id}/print/"
+        with override_settings(PDF_CACHE_DIR=cache_dir), self.assertNumQueries(queries):
+            response = self.client.get(url, {"preview": 1} if preview else {})
+            # FileResponse streams, the render already happened in the view
+            b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+
+    def test_print_preview(self):
+        entry_id, = self.create_entries(1, n_ranges=10)
+        self.print_pdf(entry_id, 3, preview=True)
+        self.assertFalse(RangeEntry.objects.filter(print_page_no__isnull=False).exists())
+
+    def test_print(self):
+        entry_id, = self.create_entries(1, n_ranges=10)
+        RangeEntry.objects.update(print_page_no=1)
+        self.print_pdf(entry_id, 3)
+
+    def test_print_assigns_pages(self):
+        entry_id, = self.create_entries(1, n_ranges=10)
+        # the three reads + one bulk UPDATE of the new page numbers
+        self.print_pdf(entry_id, 4)
+        self.assertFalse(RangeEntry.objects.filter(print_page_no__isnull=True).exists())
+
+
+# --------------------------------------------------
+# SERVICE BILL: BATCH EXPORT
+# --------------------------------------------------
+
+class ServiceBillExportTests(ApiTestCase):
+    url = "/api/service-bills/export-pdfs/"
+
+    def setUp(self):
+        super().setUp()
+        self.bill = ServiceBill.objects.create(date_of_clearing="01-01-2025", bill_date="2025-01-01")
+
+    def test_rejects_invalid_ids(self):
+        for ids in ("12", str(self.bill.id), [], ["a"], [1.5], {"id": 1}, 12):
+            with self.subTest(ids=ids):
+                response = self.client.post(self.url, {"ids": ids}, format="json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("ids", response.data)
+
+    def test_requires_ids_or_dates(self):
+        response = self.client.post(self.url, {"format": "pdf"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_unknown_format(self):
+        response = self.client.post(self.url, {"ids": [self.bill.id], "format": "doc"}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_exports_listed_bills(self):
+        response = self.client.post(self.url, {"ids": [self.bill.id]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b"".join(response.streaming_content).startswith(b"%PDF"))
+
+    def test_unknown_ids(self):
+        response = self.client.post(self.url, {"ids": [self.bill.id + 1]}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+
+class ServiceBillParallelExportTests(ApiTestCase):
+    url = "/api/service-bills/export-pdfs/"
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(bill_export.shutdown_pool)
+        self.bills = [
+            ServiceBill.objects.create(
+                date_of_clearing="2025-01-01", bill_date="2025-01-01",
+                to_address="The Manager\nFACT Ltd", letter_note="Sir,",
+            )
+            for _ in range(3)
+        ]
+        self.ids = [bill.id for bill in self.bills]
+        # a bill without sections renders no pages
+        for bill in self.bills:
+            HandlingBillSection.objects.create(
+                bill=bill, bill_number=f"H/{bill.id}", total_qty=10, rate=5,
+                bill_amount=50, cgst=0, sgst=0, total_bill_amount=50,
+            )
+
+    @override_settings(PDF_EXPORT_WORKERS=2, PDF_EXPORT_PARALLEL_MIN=2)
+    def test_pool_export(self):
+        response = self.client.post(self.url, {"ids": self.ids, "format": "zip"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        pool = bill_export._pool
+        self.assertIsNotNone(pool)
+
+        with zipfile.ZipFile(BytesIO(b"".join(response.streaming_content))) as zf:
+            self.assertEqual(zf.namelist(), [f"service-bill-{i}.pdf" for i in self.ids])
+            self.assertTrue(all(zf.read(name).startswith(b"%PDF") for name in zf.namelist()))
+
+        # the next export reuses the running pool
+        response = self.client.post(self.url, {"ids": self.ids}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIs(bill_export._pool, pool)
+        merged = PdfReader(BytesIO(b"".join(response.streaming_content)))
+        self.assertGreaterEqual(len(merged.pages), 3)
+
+    @override_settings(PDF_EXPORT_WORKERS=2, PDF_EXPORT_PARALLEL_MIN=10)
+    def test_small_export_renders_in_process(self):
+        with bill_export.rendered_bills(bill_export.load_bills(self.ids)) as paths:
+            self.assertEqual(len(paths), 3)
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertIsNone(bill_export._pool)
+        self.assertFalse(any(os.path.exists(path) for path in paths))
+
+
+# --------------------------------------------------
+# BACKGROUND JOBS
+# --------------------------------------------------
+
+class BackgroundJobTests(ApiTestCase):
+    def test_requeue_stale_running_jobs(self):
+        stale = enqueue("SERVICE_BILL_PDF", id=1)
+        fresh = enqueue("SERVICE_BILL_PDF", id=2)
+        self.assertEqual(claim_next_job().pk, stale.pk)
+        self.assertEqual(claim_next_job().pk, fresh.pk)
+        BackgroundJob.objects.filter(pk=stale.pk).update(
+            started_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(requeue_stale_jobs(stale_after=60), 1)
+        self.assertEqual(requeue_stale_jobs(stale_after=60), 0)
+
+        self.assertEqual(BackgroundJob.objects.get(pk=fresh.pk).status, "RUNNING")
+        job = claim_next_job()
+        self.assertEqual(job.pk, stale.pk)
+        self.assertEqual(job.status, "RUNNING")
+
+    def test_async_print_of_missing_object(self):
+        for url in (
+            "/api/destination-entries/999/print/",
+            "/api/service-bills/999/export-pdf/",
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url, {"async": 1})
+                self.assertEqual(response.status_code, 404)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+    def test_async_print(self):
+        bill = ServiceBill.objects.create(date_of_clearing="01-01-2025")
+        response = self.client.get(f"/api/service-bills/{bill.id}/export-pdf/", {"async": 1})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(BackgroundJob.objects.get().payload, {"id": bill.id})
+
+    def test_streaming_import_waits_for_worker(self):
+        upload = workbook_upload({"ALPHA": [["C1", "DEALER ONE", 9000000001, 670001, "PLACE A", 12]]})
+        response = self.client.post(
+            "/api/dealers/import_excel/?stream=1", {"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["status"], "PENDING")
+        self.assertEqual(response.data["job_status"], "QUEUED")
+
+        import_job = ImportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(import_job.job.payload, {"import_job_id": import_job.id})
+
+        # what the run_jobs worker does
+        run_job(claim_next_job())
+
+        response = self.client.get(f"/api/dealers/import-jobs/{import_job.id}/")
+        self.assertEqual(response.data["status"], "DONE")
+        self.assertEqual(response.data["job_status"], "DONE")
+        self.assertTrue(Dealer.objects.filter(code="C1").exists())
+
+    def test_purge_expired_results(self):
+        results_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, results_dir, ignore_errors=True)
+
+        paths = []
+        for age in (timedelta(days=2), timedelta(minutes=5)):
+            path = os.path.join(results_dir, f"job-{len(paths)}.pdf")
+            with open(path, "wb") as out:
+                out.write(b"%PDF")
+            paths.append(path)
+            BackgroundJob.objects.create(
+                kind="SERVICE_BILL_PDF",
+                payload={"id": 1},
+                status="DONE",
+                result_path=path,
+                finished_at=timezone.now() - age,
+            )
+        old, recent = BackgroundJob.objects.order_by("id")
+
+        self.assertEqual(purge_job_results(max_age=24 * 60 * 60), 1)
+        self.assertEqual(purge_job_results(max_age=24 * 60 * 60), 0)
+
+        self.assertFalse(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[1]))
+        self.assertEqual(self.client.get(f"/api/jobs/{old.id}/result/").status_code, 410)
+
+        response = self.client.get(f"/api/jobs/{recent.id}/result/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF")
+
+
+# --------------------------------------------------
+# REFERENCE LIST CACHE
+# --------------------------------------------------
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "reference": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "reference-tests",
+    },
+})
+class ReferenceCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        caches["reference"].clear()
+        self.destination = Destination.objects.create(name="ALPHA FOL", place="ALPHA", is_garage=False)
+        self.place = Place.objects.create(name="PLACE A", destination=self.destination, distance=12)
+        self.dealer = Dealer.objects.create(code="C1", name="DEALER ONE")
+
+    def test_not_modified(self):
+        response = self.client.get("/api/places/")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+
+        etag = response["ETag"]
+        response = self.client.get("/api/places/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # dates are ignored, a change within the same second must not 304
+        response = self.client.get(
+            "/api/places/", HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_is_not_cached(self):
+        response = self.client.get("/api/places/", {"search": "PLA"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+    def test_dealer_places_change(self):
+        etag = self.client.get("/api/destinations/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealer.places.add(self.place)
+
+        response = self.client.get("/api/destinations/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = self.client.get("/api/places/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealer.places.remove(self.place)
+        self.assertEqual(
+            self.client.get("/api/places/", HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
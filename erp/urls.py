@@ -2,7 +2,7 @@ from django.urls import path
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
-from .views import DealerViewSet, PlaceViewSet, DestinationViewSet, RateRangeViewSet, DestinationEntryViewSet, ServiceBillViewSet, TransportItemViewSet
+from .views import DealerViewSet, PlaceViewSet, DestinationViewSet, RateRangeViewSet, DestinationEntryViewSet, ServiceBillViewSet, TransportItemViewSet, JobViewSet
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 
@@ -14,6 +14,7 @@ router.register(r'destinations', DestinationViewSet)
 router.register(r'destination-entries', DestinationEntryViewSet)
 router.register(r'service-bills', ServiceBillViewSet)
 router.register(r'transport-items', TransportItemViewSet)
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
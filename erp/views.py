@@ -1,7 +1,10 @@
 import os
-from .models import Dealer, Place, Destination, RateRange, DestinationEntry, RangeEntry, DealerEntry, ServiceBill, TransportItem
-from .serializers import DealerSerializer, PlaceSerializer, DestinationSerializer, RateRangeSerializer, DestinationEntrySerializer, DestinationEntryWriteSerializer, DestinationEntryDetailSerializer, TransportDepotRangeEntrySerializer, ServiceBillSerializer, PlaceListSerializer, TransportItemSerializer
-from django.db.models import Q
+import json
+import base64
+import tempfile
+from .models import Dealer, Place, Destination, RateRange, DestinationEntry, RangeEntry, DealerEntry, ServiceBill, TransportItem, ImportJob, BackgroundJob
+from .serializers import DealerSerializer, PlaceSerializer, DestinationSerializer, RateRangeSerializer, DestinationEntrySerializer, DestinationEntryWriteSerializer, DestinationEntryDetailSerializer, TransportDepotRangeEntrySerializer, ServiceBillSerializer, PlaceListSerializer, TransportItemSerializer, ImportJobSerializer, BackgroundJobSerializer, ServiceBillExportSerializer, with_first_dealer, service_bill_read_queryset, service_bill_summaries, SERVICE_BILL_SUMMARY_FIELDS
+from django.db.models import Q, Exists, OuterRef
 from .base import AppBaseViewSet, BaseViewSet
 import pandas as pd
 from rest_framework.decorators import action
@@ -12,7 +15,8 @@ from rest_framework.exceptions import APIException
 from rest_framework.views import APIView
 
 from django.db.models import Prefetch
-from django.http import FileResponse
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
@@ -28,22 +32,77 @@ from reportlab.pdfgen import canvas
 from collections import defaultdict
 from .utils import fmt_km
 from .service_bill import generate_service_bill_pdf
+from .bill_export import load_bills, rendered_bills, write_merged_pdf, write_zip
+from .dealer_import import REQUIRED_COLUMNS, map_columns, import_dealer_rows
+from .jobs import enqueue, RESULT_FILENAMES
+from .print_data import load_destination_entry_print_data
+from .fol_preview import load_fol_preview_groups
+from .pdf_templates import (
+    pdf_output, ENTRY_PAGESIZE, ENTRY_MARGINS, ENTRY_STYLES, ENTRY_COMPANY_HEADER, ENTRY_FOOTER,
+    ENTRY_RANGE_HEADER, ENTRY_RANGE_COL_WIDTHS, ENTRY_RANGE_TABLE_STYLE,
+)
+from . import pdf_cache
+from .rate_index import get_rate_range_index, get_rate_range
+from .filters import TrigramSearchFilter
+from .pagination import PageOrKeysetPagination
+from .reference_cache import reference_cached
+from .place_catalogue import columnar_places, gzip_response
+from rest_framework import filters
+from django_filters.rest_framework import DjangoFilterBackend
 from django.http import HttpResponse
 from datetime import datetime
+from openpyxl import load_workbook
 
 
 
 
-def safe_float(val):
-    if pd.isna(val):
-        return 0
-    val = str(val).strip()
-    if val == "" or val.lower() == "nil" or val == "-":
-        return 0
+# bytes per chunk when streaming a PDF to the client
+PDF_STREAM_BLOCK_SIZE = 64 * 1024
+
+# max rows per page for by-destination keyset paging
+BY_DESTINATION_MAX_LIMIT = 500
+
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor):
     try:
-        return float(val)
-    except:
-        return 0
+        distance, name, last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(distance), str(name), int(last_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def not_modified(request, digest):
+    """304 response when If-None-Match already names this digest, else None"""
+    etag = quote_etag(digest)
+    tags = [t.removeprefix("W/") for t in parse_etags(request.headers.get("If-None-Match", ""))]
+    if "*" in tags or etag in tags:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+    return None
+
+
+def pdf_response(pdf, filename, digest=None):
+    """
+    Inline PDF response. With a digest the response carries it as ETag;
+    no-cache makes browsers revalidate, which not_modified answers.
+    """
+    response = FileResponse(
+        pdf,
+        as_attachment=False,
+        filename=filename,
+        content_type="application/pdf",
+    )
+    response.block_size = PDF_STREAM_BLOCK_SIZE
+    if digest:
+        response["ETag"] = quote_etag(digest)
+        response["Cache-Control"] = "private, no-cache"
+    return response
+
 
 class PageTrackingCanvas(canvas.Canvas):
     def __init__(self, *args, **kwargs):
@@ -136,10 +195,11 @@ class BreakableRangeBlock(Flowable):
 
     def draw(self):
         # Select proper heading
+        # page numbers are only recorded here, generate_pdf writes them after the build
         if hasattr(self.canv, "page_number") and hasattr(self, "range_entry"):
             if self.range_entry.print_page_no is None:
                 self.range_entry.print_page_no = self.canv.page_number
-                self.range_entry.save(update_fields=["print_page_no"])
+                self.page_assignments[self.range_entry.id] = self.range_entry
 
         if self.is_continuation:
             p = Paragraph(self.title_cont, self.style)
@@ -156,23 +216,37 @@ class BreakableRangeBlock(Flowable):
         # Draw table
         self.table.drawOn(self.canv, 0, 0)
 class PlaceViewSet(AppBaseViewSet):
-    queryset = Place.objects.all().order_by("name")
+    queryset = Place.objects.select_related("destination").order_by("name")
     serializer_class = PlaceSerializer
+    filter_backends = [TrigramSearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ['name', 'district']      
+    search_rank_fields = ['name']
     ordering_fields = ['name', 'distance', 'district', 'destination__name']  
     
+    @reference_cached(Place, Destination)
     def list(self, request, *args, **kwargs):
         if request.query_params.get("all") == "1":
             queryset = self.filter_queryset(self.get_queryset())
+            if request.query_params.get("columnar") == "1":
+                return Response(columnar_places(queryset))
             serializer = PlaceListSerializer(queryset, many=True)
             return Response({"results": serializer.data})
         return super().list(request, *args, **kwargs)
 
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # the full catalogue is the one large body here, compress it
+        if self.action == "list" and request.query_params.get("all") == "1":
+            response = gzip_response(request, response)
+        return response
+
 
 class DealerViewSet(AppBaseViewSet):
-    queryset = Dealer.objects.all().order_by("code")
+    queryset = Dealer.objects.prefetch_related("places__destination").order_by("code")
     serializer_class = DealerSerializer
+    filter_backends = [TrigramSearchFilter, filters.OrderingFilter, DjangoFilterBackend]
     search_fields = ["name", "code", "mobile", "places__name"]
+    search_rank_fields = ["name", "code"]
     ordering_fields = ["name", "code"]
 
     @action(detail=False, methods=["post"], url_path="import_excel")
@@ -181,6 +255,9 @@ class DealerViewSet(AppBaseViewSet):
         if not file:
             return Response({"error": "No file uploaded"}, status=400)
 
+        if request.query_params.get("stream") == "1":
+            return self._start_streaming_import(file)
+
         try:
             # Load workbook with sheet names
             excel = pd.ExcelFile(file)
@@ -190,30 +267,6 @@ class DealerViewSet(AppBaseViewSet):
         created_dealers = 0
         created_places = 0
         created_destinations = 0
-        
-        def clean_number(val):
-            """Clean mobile/pincode values from Excel"""
-            if pd.isna(val):
-                return ""
-            
-            s = str(val).strip()
-
-            # Remove trailing .0 (Excel float)
-            if s.endswith(".0"):
-                s = s[:-2]
-
-            # Remove spaces
-            s = s.replace(" ", "")
-
-            # Convert scientific notation (e.g., 6.78E5)
-            if "e" in s.lower():
-                try:
-                    s = str(int(float(s)))
-                except:
-                    pass
-
-            return s
-
 
         with transaction.atomic():
             for sheet_name in excel.sheet_names:
@@ -227,31 +280,13 @@ class DealerViewSet(AppBaseViewSet):
                 # Clean column names
                 df.columns = df.columns.str.lower().str.strip()
 
-                # Required columns
-                required_cols = {
-                    "code": ["code", "dealer code", "Customer No"],
-                    "name": ["name", "dealer name", "Name 1"],
-                    "mobile": ["mobile", "phone", "mob no.", "mob.no."],
-                    "pincode": ["pincode", "pin", "pin code"],
-                    "place": ["place", "Unloading Point"],
-                    "distance": ["distance", "km","Distance from Rail Head", "RH Distance"]
-                }
-                col_map = {}
-                
-                for field, possible in required_cols.items():
-                    found = None
-                    for col in df.columns:
-                        if col in [p.lower() for p in possible]:
-                            found = col
-                            break
-                    if not found:
-                        return Response(
-                            {"error": f"Column '{field}' missing in sheet '{sheet_name}'. Expected one of {possible}"},
-                            status=400
-                        )
-                    col_map[field] = found
+                col_map, missing = map_columns(df.columns)
+                if missing:
+                    return Response(
+                        {"error": f"Column '{missing}' missing in sheet '{sheet_name}'. Expected one of {REQUIRED_COLUMNS[missing]}"},
+                        status=400
+                    )
 
-            
                 # Destination
                 destination_name = f"{sheet_name} FOL"
                 destination, created = Destination.objects.get_or_create(
@@ -259,40 +294,18 @@ class DealerViewSet(AppBaseViewSet):
                 )
                 if created:
                     created_destinations += 1
-                    
-
-                # Loop rows
-                for _, row in df.iterrows():
-
-                    # ---- SAFE distance handling ----
-                    raw_distance = row[col_map["distance"]]
-                    distance_value = safe_float(raw_distance)
 
-                    # ---- Get/Create Place ----
-                    place, place_created = Place.objects.get_or_create(
-                        name=str(row[col_map["place"]]).strip(),
-                        district=sheet_name if sheet_name != "Sheet1" else None,
-                        destination=destination,
-                        defaults={"distance": distance_value}
-                    )
-                    if place_created:
-                        created_places += 1
-
-                    # ---- Get/Create Dealer ----
-                    dealer, dealer_created = Dealer.objects.get_or_create(
-                        code=str(row[col_map["code"]]).strip(),
-                        defaults={
-                            "name": str(row[col_map["name"]]).strip(),
-                            "mobile": clean_number(row[col_map["mobile"]]),
-                            "pincode": clean_number(row[col_map["pincode"]]),
-
-                        }
-                    )
-                    if dealer_created:
-                        created_dealers += 1
+                # Column-wise extraction instead of df.iterrows()
+                columns = {field: df[col].tolist() for field, col in col_map.items()}
+                rows = (dict(zip(columns, values)) for values in zip(*columns.values()))
 
-                    # ---- Add place M2M ----
-                    dealer.places.add(place)
+                counts = import_dealer_rows(
+                    destination,
+                    sheet_name if sheet_name != "Sheet1" else None,
+                    rows,
+                )
+                created_dealers += counts["dealers_created"]
+                created_places += counts["places_created"]
 
         return Response({
             "status": "success",
@@ -300,6 +313,41 @@ class DealerViewSet(AppBaseViewSet):
             "places_created": created_places,
             "destinations_created": created_destinations,
         }, status=200)
+
+    def _start_streaming_import(self, file):
+        """
+        Streaming mode: keep the upload on disk, queue the chunked import
+        for the job worker and let the client poll import-jobs/<id>/.
+        Nothing runs the import unless a `manage.py run_jobs` worker is up;
+        until then the import is PENDING and its `job_status` QUEUED.
+        """
+        fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="dealer-import-")
+        with os.fdopen(fd, "wb") as out:
+            for chunk in file.chunks():
+                out.write(chunk)
+
+        try:
+            # read_only open is lazy, this only checks the file is an xlsx workbook
+            load_workbook(path, read_only=True).close()
+        except Exception as e:
+            os.remove(path)
+            return Response({"error": f"Unable to read Excel: {e}"}, status=400)
+
+        with transaction.atomic():
+            job = ImportJob.objects.create(file_name=file.name, file_path=path)
+            job.job = enqueue("DEALER_IMPORT", import_job_id=job.id)
+            job.save(update_fields=["job"])
+
+        return Response(ImportJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=False, methods=["GET"], url_path=r"import-jobs/(?P<job_id>\d+)")
+    def import_job(self, request, job_id=None):
+        try:
+            job = ImportJob.objects.select_related("job").get(id=job_id)
+        except ImportJob.DoesNotExist:
+            return Response({"error": "Import job not found"}, status=404)
+
+        return Response(ImportJobSerializer(job).data)
         
     @action(detail=False, methods=["GET"])
     def filter_by_range(self, request):
@@ -307,9 +355,8 @@ class DealerViewSet(AppBaseViewSet):
         if not range_id:
             return Response({"error": "range_id required"}, status=400)
 
-        try:
-            rr = RateRange.objects.get(id=range_id)
-        except RateRange.DoesNotExist:
+        rr = get_rate_range(int(range_id)) if range_id.isdigit() else None
+        if rr is None:
             return Response({"error": "Range not found"}, status=404)
 
         destination_id = request.query_params.get("destination_id")
@@ -348,63 +395,98 @@ class DealerViewSet(AppBaseViewSet):
     
     @action(detail=False, methods=["GET"], url_path="by-destination")
     def by_destination(self, request):
+        """
+        Dealer / place pairs of a destination, straight off the Dealer-Place
+        through table in one query (search + ordering in SQL).
+        Optional `limit` switches to keyset paging:
+        {"results": [...], "next_cursor": "..."} - pass next_cursor back as `cursor`.
+        """
         dest_id = request.query_params.get("destination_id")
         if not dest_id:
             return Response({"detail": "destination_id is required"}, status=400)
 
-        search = request.query_params.get("search", "").strip().lower()
+        search = request.query_params.get("search", "").strip()
+        limit = request.query_params.get("limit")
+        cursor = request.query_params.get("cursor")
+
+        if limit is not None:
+            if not limit.isdigit() or int(limit) < 1:
+                return Response({"detail": "limit must be a positive integer"}, status=400)
+            limit = min(int(limit), BY_DESTINATION_MAX_LIMIT)
+
+        rows = Dealer.places.through.objects.filter(
+            place__destination_id=dest_id,
+            dealer__active=True,
+        )
+
+        if search:
+            # a pair matches on either the dealer or the place
+            rows = rows.filter(
+                Q(dealer__name__icontains=search) |
+                Q(dealer__code__icontains=search) |
+                Q(place__name__icontains=search) |
+                Q(place__district__icontains=search)
+            )
+
+        if cursor:
+            try:
+                distance, dealer_name, last_id = decode_cursor(cursor)
+            except ValueError:
+                return Response({"detail": "Invalid cursor"}, status=400)
+
+            rows = rows.filter(
+                Q(place__distance__gt=distance) |
+                Q(place__distance=distance, dealer__name__gt=dealer_name) |
+                Q(place__distance=distance, dealer__name=dealer_name, id__gt=last_id)
+            )
 
-        # Prefetch dealers for places (unfiltered so we can match dealer names too)
-        dealer_prefetch = Prefetch(
-            "dealers",
-            queryset=Dealer.objects.filter(active=True).order_by("name"),
-            to_attr="prefetched_dealers"
+        rows = rows.order_by("place__distance", "dealer__name", "id").values(
+            "id",
+            "dealer_id",
+            "dealer__code",
+            "dealer__name",
+            "place_id",
+            "place__name",
+            "place__distance",
+            "place__district",
         )
 
-        # Get all places for destination (we will apply search logic in Python)
-        places = Place.objects.filter(destination_id=dest_id).prefetch_related(dealer_prefetch).order_by("distance")
+        if limit is not None:
+            rows = list(rows[:limit + 1])
+            has_more = len(rows) > limit
+            rows = rows[:limit]
+        else:
+            has_more = False
 
+        rate_index = get_rate_range_index()
         results = []
 
-        for place in places:
-            place_matches = False
-            if search:
-                # check place-level match
-                if search in (place.name or "").lower() or search in (place.district or "").lower():
-                    place_matches = True
-
-            for dealer in getattr(place, "prefetched_dealers", []):
-                # If there's a search term, allow match if either dealer or place matches
-                if search:
-                    dealer_matches = (
-                        search in (dealer.name or "").lower() or
-                        search in (dealer.code or "").lower()
-                    )
-                    if not (dealer_matches or place_matches):
-                        continue  # skip this pair
-                # find RateRange for this place distance
-                rr = RateRange.objects.filter(
-                    from_km__lte=place.distance,
-                    to_km__gte=place.distance
-                ).first()
-
-                results.append({
-                    "dealer_id": dealer.id,
-                    "dealer_code": dealer.code,
-                    "dealer_name": dealer.name,
-                    "place_id": place.id,
-                    "place_name": place.name,
-                    "distance": place.distance,
-                    "district": place.district,
-                    "rate_range_id": rr.id if rr else None,
-                    "rate": rr.rate if rr else None,
-                    "is_mtk": rr.is_mtk if rr else None,
-                })
-
-        # sort and return
-        results.sort(key=lambda x: (x["distance"] or 0, x["dealer_name"] or ""))
+        for r in rows:
+            # slab comes from the in-memory interval index, no join needed
+            rr = rate_index.find(r["place__distance"])
 
-        return Response(results)
+            results.append({
+                "dealer_id": r["dealer_id"],
+                "dealer_code": r["dealer__code"],
+                "dealer_name": r["dealer__name"],
+                "place_id": r["place_id"],
+                "place_name": r["place__name"],
+                "distance": r["place__distance"],
+                "district": r["place__district"],
+                "rate_range_id": rr.id if rr else None,
+                "rate": rr.rate if rr else None,
+                "is_mtk": rr.is_mtk if rr else None,
+            })
+
+        if limit is None:
+            return Response(results)
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = encode_cursor(last["place__distance"], last["dealer__name"], last["id"])
+
+        return Response({"results": results, "next_cursor": next_cursor})
 
 class RateRangeViewSet(AppBaseViewSet):
     queryset = RateRange.objects.all().order_by("from_km")
@@ -412,30 +494,70 @@ class RateRangeViewSet(AppBaseViewSet):
     search_fields = ['from_km', 'to_km']        
     ordering_fields = ['from_km', 'to_km']
 
+    @reference_cached(RateRange)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class TransportItemViewSet(AppBaseViewSet):
     queryset = TransportItem.objects.all().order_by("name")
     serializer_class = TransportItemSerializer
     search_fields = ['name', 'description']        
     ordering_fields = ['name']
-    
+
+    @reference_cached(TransportItem)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+
 class DestinationViewSet(AppBaseViewSet):
     queryset = Destination.objects.all().order_by("name")
     serializer_class = DestinationSerializer
     search_fields = ['name', 'place']        
     ordering_fields = ['name']  
+
+    # garage_details reads the garage's Place and Dealer rows
+    @reference_cached(Destination, Place, Dealer)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
     
 
 class DestinationEntryViewSet(BaseViewSet):
     search_fields = ["id", "bill_number", "destination__name", "transport_type"]
     ordering_fields = ["id", "date", "bill_number"]
     queryset = DestinationEntry.objects.all().order_by("-id")
+    pagination_class = PageOrKeysetPagination
 
     def get_serializer_class(self):
         if self.action in ["create", "update", "partial_update"]:
             return DestinationEntryWriteSerializer
         return DestinationEntrySerializer
 
+    def get_queryset(self):
+        """
+        One prefetch plan per read action; the serializers only walk the
+        prefetched relations so the query count does not grow with page size.
+        """
+        qs = super().get_queryset()
+
+        if self.action in ["list", "transport_fol_unbilled"]:
+            # products / slabs / totals come from the summary columns
+            return qs.select_related("destination", "service_bill")
+
+        if self.action == "retrieve":
+            return qs.select_related("destination").prefetch_related(
+                Prefetch(
+                    "range_entries",
+                    queryset=RangeEntry.objects.select_related("rate_range").order_by("id"),
+                ),
+                Prefetch(
+                    "range_entries__dealer_entries",
+                    queryset=DealerEntry.objects.select_related("dealer").order_by("id"),
+                ),
+            )
+
+        return qs
+
     # Custom action to create nested entry
     @action(detail=False, methods=["post"], url_path="create-full")
     def create_full(self, request):
@@ -451,20 +573,55 @@ class DestinationEntryViewSet(BaseViewSet):
     
     @action(detail=True, methods=["GET"])
     def print(self, request, pk=None):
-        pdf_bytes = self.generate_pdf(pk)  # we re-use your logic below
+        if request.query_params.get("async") == "1":
+            # 404 now rather than a job that can only fail
+            job = enqueue("DESTINATION_ENTRY_PDF", id=self.get_object().pk)
+            return Response(BackgroundJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-        return FileResponse(
-            pdf_bytes,
-            as_attachment=False,
-            filename=f"destination-entry-{pk}.pdf",
-            content_type="application/pdf",
-        )
+        # ?preview=1 renders without saving newly assigned page numbers
+        persist = request.query_params.get("preview") != "1"
+        filename = f"destination-entry-{pk}.pdf"
+
+        try:
+            data = load_destination_entry_print_data(pk)
+        except DestinationEntry.DoesNotExist:
+            raise Http404
+
+        # until every range has a page number the render changes the rows
+        pages_assigned = all(r.print_page_no is not None for r, _ in data[1])
+
+        if pages_assigned:
+            digest = pdf_cache.destination_entry_digest(*data)
+            response = not_modified(request, digest)
+            if response:
+                return response
+
+            cached = pdf_cache.open_cached("destination-entry", pk, digest)
+            if cached:
+                return pdf_response(cached, filename, digest)
+
+        pdf_bytes = self.generate_pdf(pk, persist=persist, data=data)
+
+        if not (persist or pages_assigned):
+            # preview page numbers only live in memory, nothing to cache
+            return pdf_response(pdf_bytes, filename)
+
+        # ranges now carry the page numbers that were just saved
+        digest = pdf_cache.destination_entry_digest(*data)
+        pdf_cache.store("destination-entry", pk, digest, pdf_bytes)
+        return pdf_response(pdf_bytes, filename, digest)
 
 
-    def generate_pdf(self, entry_id):
+    def generate_pdf(self, entry_id, persist=True, data=None):
+        """
+        Build the entry PDF. Ranges without a print_page_no get one during
+        the build; with persist=True they are saved in a single bulk_update
+        at the end, with persist=False nothing is written.
+        `data` is a preloaded load_destination_entry_print_data result.
+        """
 
-        # fetch main entry
-        entry = DestinationEntry.objects.select_related("destination").get(id=entry_id)
+        # fetch main entry, its ranges and dealer rows (3 queries)
+        entry, ranges = data or load_destination_entry_print_data(entry_id)
         destination = entry.destination
         bill_number = entry.bill_number
         date = datetime.strptime(entry.date, "%Y-%m-%d").strftime("%d-%m-%Y")
@@ -472,37 +629,14 @@ class DestinationEntryViewSet(BaseViewSet):
         to_address = entry.to_address
 
         # pdf setup
-        buffer = BytesIO()
+        buffer = pdf_output()
         doc = SimpleDocTemplate(
             buffer,
-            pagesize=landscape(A4),
-            leftMargin=20,
-            rightMargin=20,
-            topMargin=120,
-            bottomMargin=80,
+            pagesize=ENTRY_PAGESIZE,
+            **ENTRY_MARGINS,
         )
 
-        # STYLES
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='Small', fontSize=8, leading=10))
-        styles.add(ParagraphStyle(name='NormalBold', fontSize=10, leading=11, fontName='Helvetica-Bold'))
-        styles.add(ParagraphStyle(name='TitleBold', fontSize=13, leading=14, fontName='Helvetica-Bold', alignment=TA_LEFT))
-        styles.add(ParagraphStyle(name='CustomNormal', fontSize=10, leading=12))
-        styles.add(ParagraphStyle(name='CenterBold', fontSize=10, fontName='Helvetica-Bold', alignment=TA_CENTER))
-        styles.add(ParagraphStyle(
-            name='SmallHeader',
-            fontSize=8,
-            leading=9,
-            fontName='Helvetica-Bold',
-            alignment=TA_CENTER
-        ))
-
-        styles.add(ParagraphStyle(
-            name='Tiny',
-            fontSize=7.5,
-            leading=9
-        ))
-
+        styles = ENTRY_STYLES
 
         elements = []
 
@@ -512,40 +646,35 @@ class DestinationEntryViewSet(BaseViewSet):
                 return ""
             return text if len(text) <= max_len else text[:max_len] + "…"
 
-        # company header
-        left_column = [
-            Paragraph("GSTIN: 32ACNFS 8060K1ZP", styles['Small']),
-            Paragraph("M/s. SHAN ENTERPRISES", styles['TitleBold']),
-            Paragraph("Clearing & Transporting contractor", styles['CustomNormal']),
-            Paragraph("21-4185, C-Meenchanda gate Calicut - 673018", styles['CustomNormal']),
-            Paragraph("Mob: 9447004108", styles['CustomNormal']),
-        ]
-
         to_split = to_address.split("\n") if to_address else []
         right_column = [Paragraph(line, styles['CustomNormal']) for line in to_split] + [
             Spacer(1, 12),
             Paragraph(f"Date: {date}", styles['CustomNormal']),
         ]
 
+        # same header on every page, so build and wrap it once
+        header_table = Table(
+            [[ENTRY_COMPANY_HEADER, "", right_column]],
+            colWidths=[480, 40, 300]
+        )
+        _, header_h = header_table.wrap(doc.width, doc.topMargin)
+
         # BILL BLOCK
         elements.append(Spacer(1, 4))
         elements.append(Paragraph("Sir,", styles["CustomNormal"]))
         elements.append(Paragraph(letter_note if letter_note else "Please find the details below:", styles["CustomNormal"]))
         elements.append(Spacer(1, 10))
 
-        # ranges
-        ranges = RangeEntry.objects.filter(destination_entry=entry)
-
-        page_width, _ = landscape(A4)
-        usable_width = page_width - doc.leftMargin - doc.rightMargin
-        
         def clean_km(v):
             return int(v) if float(v).is_integer() else v
         
         current_expected_page = 1
+
+        # range_entry.id -> range_entry whose print_page_no was assigned here
+        page_assignments = {}
         
-        for range_entry in ranges:
-            rr = RateRange.objects.get(id=range_entry.rate_range_id)
+        for range_entry, dealer_rows in ranges:
+            rr = range_entry.rate_range
             
             # Range Title
             range_title = f"{destination.name.upper()} &nbsp; {clean_km(rr.from_km)} - {clean_km(rr.to_km)}"
@@ -555,28 +684,22 @@ class DestinationEntryViewSet(BaseViewSet):
             # elements.append(Paragraph(range_title, styles['CenterBold']))
             # elements.append(Spacer(1, 3))
 
-            dealer_entries = DealerEntry.objects.filter(range_entry=range_entry)
-
-            table_data = [[
-                "SL NO", "Date", "MDA NO", "Description", "Despatched to",
-                "Bag", "MT", "KM", "MTK", "Rate", "Amount", Paragraph("Remarks / Bill.Doc.", styles['SmallHeader'])
-
-            ]]
+            table_data = [list(ENTRY_RANGE_HEADER)]
 
-            for i, d in enumerate(dealer_entries, start=1):
+            for i, (d_date, mda_number, description, despatched_to, no_bags, mt, km, mtk, amount, remarks, bill_doc) in enumerate(dealer_rows, start=1):
                 table_data.append([
                     str(i),
-                    str(datetime.strptime(d.date, "%Y-%m-%d").strftime("%d-%m-%Y")),
-                    d.mda_number,
-                    trim(d.description),
-                    trim(d.despatched_to),
-                    d.no_bags,
-                    f"{d.mt:.3f}",
-                    d.km,
-                    f"{d.mtk:.2f}",
+                    str(datetime.strptime(d_date, "%Y-%m-%d").strftime("%d-%m-%Y")),
+                    mda_number,
+                    trim(description),
+                    trim(despatched_to),
+                    no_bags,
+                    f"{mt:.3f}",
+                    km,
+                    f"{mtk:.2f}",
                     f"{range_entry.rate:.2f}",
-                    f"{d.amount:.2f}",
-                    Paragraph(f"{d.remarks or ''} {d.bill_doc or ''}", styles['Tiny'])
+                    f"{amount:.2f}",
+                    Paragraph(f"{remarks or ''} {bill_doc or ''}", styles['Tiny'])
                 ])
 
             # Total Row
@@ -591,28 +714,8 @@ class DestinationEntryViewSet(BaseViewSet):
                 ""
             ])
 
-            
-
-            col_widths = [30, 45, 55, 70, 180, 35, 40, 40, 45, 40, 50, 40]
-            scale = (usable_width * 0.98) / sum(col_widths)
-            col_widths = [w * scale for w in col_widths]
-
-            table = Table(table_data, colWidths=col_widths, repeatRows=1)
-            table.setStyle(TableStyle([
-                ('GRID', (0,0), (-1,-1), 0.7, colors.black),
-                ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                ('FONT', (0,0), (-1,0), 'Helvetica-Bold'),
-                ('FONT', (0,-1), (-1,-1), 'Helvetica-Bold'),
-                ('VALIGN', (0,0), (-1,-1), 'TOP'),
-
-                # Global padding
-                ('LEFTPADDING', (0,0), (-1,-1), 3),
-                ('RIGHTPADDING', (0,0), (-1,-1), 3),
-
-                # 🔽 Reduce padding only for Remarks column (last column)
-                ('LEFTPADDING', (-1,0), (-1,-1), 2),
-                ('RIGHTPADDING', (-1,0), (-1,-1), 2),
-            ]))
+            table = Table(table_data, colWidths=ENTRY_RANGE_COL_WIDTHS, repeatRows=1)
+            table.setStyle(ENTRY_RANGE_TABLE_STYLE)
             
             if range_entry.print_page_no:
                 while current_expected_page < range_entry.print_page_no:
@@ -626,40 +729,23 @@ class DestinationEntryViewSet(BaseViewSet):
                 style=styles['CenterBold']
             )
             block.range_entry = range_entry
+            block.page_assignments = page_assignments
 
             elements.append(block)
             elements.append(Spacer(1, 12))
             
             if range_entry.print_page_no is None:
                 range_entry.print_page_no = current_expected_page
-                range_entry.save(update_fields=["print_page_no"])
+                page_assignments[range_entry.id] = range_entry
 
 
         elements.append(Spacer(1, 20))
 
-        # HEADER & FOOTER DRAW
+        # HEADER & FOOTER DRAW (both already wrapped)
         def draw_header_footer(canvas, doc):
             canvas.saveState()
-
-            header_table = Table(
-                [[left_column, "", right_column]],
-                colWidths=[480, 40, 300]
-            )
-            hw, hh = header_table.wrap(doc.width, doc.topMargin)
-            header_table.drawOn(canvas, doc.leftMargin, doc.height + doc.topMargin - hh + 40)
-
-            footer_data = [[
-                Paragraph("Passed by", styles['CustomNormal']),
-                "",
-                Paragraph("Officer in charge", styles['CustomNormal']),
-                "",
-                Paragraph("Signature of contractor", styles['CustomNormal'])
-            ]]
-
-            footer_table = Table(footer_data, colWidths=[140, 120, 140, 120, 140])
-            fw, fh = footer_table.wrap(doc.width, doc.bottomMargin)
-            footer_table.drawOn(canvas, doc.leftMargin, 15 * mm)
-
+            header_table.drawOn(canvas, doc.leftMargin, doc.height + doc.topMargin - header_h + 40)
+            ENTRY_FOOTER.drawOn(canvas, doc.leftMargin, 15 * mm)
             canvas.restoreState()
 
         doc.build(
@@ -669,6 +755,8 @@ class DestinationEntryViewSet(BaseViewSet):
             canvasmaker=PageTrackingCanvas
         )
 
+        if persist and page_assignments:
+            RangeEntry.objects.bulk_update(page_assignments.values(), ["print_page_no"])
 
         buffer.seek(0)
         return buffer
@@ -701,12 +789,18 @@ class DestinationEntryViewSet(BaseViewSet):
         
         
         if item:
-            qs = qs.filter(dealer_entries__description__icontains=item)
+            qs = qs.filter(Exists(
+                DealerEntry.objects.filter(
+                    range_entry=OuterRef("pk"),
+                    description__icontains=item,
+                )
+            ))
 
-        qs = qs.select_related(
+        # km / product come from subqueries, not two queries per row
+        qs = with_first_dealer(qs.select_related(
             "destination_entry",
             "destination_entry__destination",
-        ).distinct()
+        ))
 
         serializer = TransportDepotRangeEntrySerializer(qs, many=True)
         return Response({"results": serializer.data})
@@ -717,7 +811,7 @@ class DestinationEntryViewSet(BaseViewSet):
         service_bill_id = request.query_params.get("service_bill_id")
         item = request.query_params.get("item")
         
-        qs = self.queryset.filter(
+        qs = self.get_queryset().filter(
                 Q(transport_type="TRANSPORT_FOL") |
                 Q(destination__is_garage=False) | 
                 Q(destination__is_garage__isnull=True)
@@ -726,9 +820,7 @@ class DestinationEntryViewSet(BaseViewSet):
                 Q(service_bill_id=service_bill_id)
             )
         if item:
-            qs = qs.filter(range_entries__dealer_entries__description__icontains=item)
-            
-        qs = qs.distinct()
+            qs = qs.filter(products_summary__icontains=item)
         
 
         serializer = self.get_serializer(qs, many=True)
@@ -753,38 +845,16 @@ class DestinationEntryViewSet(BaseViewSet):
             )
 
         # ------------------------------------------------------------
-        # Fetch only TRANSPORT_FOL slab range entries
+        # Slab → Destination totals, grouped and summed in SQL
         # ------------------------------------------------------------
-        range_entries = (
-            RangeEntry.objects
-            .select_related(
-                "destination_entry__destination",
-                "rate_range"
-            )
-            .filter(
-                Q(destination_entry_id__in=destination_entry_ids) &
-                Q(Q(destination_entry__transport_type="TRANSPORT_FOL") |
-                Q(destination_entry__destination__is_garage=False) ) &
-                Q(rate_range__isnull=False)
-            )
-        )
+        groups = load_fol_preview_groups(destination_entry_ids)
 
-        if not range_entries.exists():
+        if not groups:
             return Response(
                 {"detail": "No Transport FOL slab entries found"},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # ------------------------------------------------------------
-        # Group: Slab → Destination
-        # ------------------------------------------------------------
-        grouped = defaultdict(lambda: defaultdict(list))
-
-        for entry in range_entries:
-            slab = entry.rate_range
-            destination = entry.destination_entry.destination
-            grouped[slab][destination].append(entry)
-
         slabs = []
         grand_total_qty = 0
         grand_total_amount = 0
@@ -792,29 +862,23 @@ class DestinationEntryViewSet(BaseViewSet):
         # ------------------------------------------------------------
         # Build slab-wise response
         # ------------------------------------------------------------
-        for slab, destinations in grouped.items():
-            slab_qty = 0
-            slab_mtk = 0
-            slab_amount = 0
-
-            destination_rows = []
-
-            for destination, entries in destinations.items():
-                dest_qty = sum(e.total_mt or 0 for e in entries)
-                dest_mtk = sum(e.total_mtk or 0 for e in entries)
-                dest_amount = sum(e.total_amount or 0 for e in entries)
-
-                slab_qty += dest_qty
-                slab_mtk += dest_mtk
-                slab_amount += dest_amount
-
-                destination_rows.append({
-                    "destination_entry_id": entries[0].destination_entry_id,
-                    "destination_place": destination.place,
-                    "qty_mt": round(dest_qty, 2),
-                    "qty_mtk": round(dest_mtk, 2),
-                    "amount": round(dest_amount, 2),
-                })
+        for rate_range_id, destinations in groups:
+            slab = get_rate_range(rate_range_id)
+
+            slab_qty = sum(d["qty_mt"] for d in destinations)
+            slab_mtk = sum(d["qty_mtk"] for d in destinations)
+            slab_amount = sum(d["amount"] for d in destinations)
+
+            destination_rows = [
+                {
+                    "destination_entry_id": d["destination_entry_id"],
+                    "destination_place": d["destination_place"],
+                    "qty_mt": round(d["qty_mt"], 2),
+                    "qty_mtk": round(d["qty_mtk"], 2),
+                    "amount": round(d["amount"], 2),
+                }
+                for d in destinations
+            ]
 
             slabs.append({
                 "range_slab": f"{fmt_km(slab.from_km)} - {fmt_km(slab.to_km)}",
@@ -845,6 +909,7 @@ class DestinationEntryViewSet(BaseViewSet):
 class ServiceBillViewSet(BaseViewSet):
     queryset = ServiceBill.objects.all()
     serializer_class = ServiceBillSerializer
+    pagination_class = PageOrKeysetPagination
     search_fields = [
         "id",
         "bill_date",
@@ -891,14 +956,125 @@ class ServiceBillViewSet(BaseViewSet):
      
     @action(detail=True, methods=["GET"], url_path="export-pdf")
     def export_pdf(self, request, pk=None):
+        if request.query_params.get("async") == "1":
+            # 404 now rather than a job that can only fail
+            job = enqueue("SERVICE_BILL_PDF", id=self.get_object().pk)
+            return Response(BackgroundJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        filename = f"service-bill-{pk}.pdf"
+
+        try:
+            digest = pdf_cache.service_bill_digest(pk)
+        except ServiceBill.DoesNotExist:
+            raise Http404
+
+        response = not_modified(request, digest)
+        if response:
+            return response
+
+        cached = pdf_cache.open_cached("service-bill", pk, digest)
+        if cached:
+            return pdf_response(cached, filename, digest)
+
         pdf_buffer = generate_service_bill_pdf(pk)
+        pdf_cache.store("service-bill", pk, digest, pdf_buffer)
+        return pdf_response(pdf_buffer, filename, digest)
+        
+    @action(detail=False, methods=["POST"], url_path="export-pdfs")
+    def export_pdfs(self, request):
+        """
+        Many bills in one download.
+        Body: {"ids": [...]} and/or {"date_from": "YYYY-MM-DD", "date_to": "YYYY-MM-DD"},
+        "format": "pdf" (one merged document, default) or "zip" (one file per bill).
+        """
+        serializer = ServiceBillExportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+        export_format = params["format"]
+
+        bills = load_bills(params.get("ids"), params.get("date_from"), params.get("date_to"))
+        if not bills:
+            return Response(
+                {"detail": "No service bills found"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # spooled to disk and streamed from there, deleted once the response closes
+        out = tempfile.TemporaryFile()
+        with rendered_bills(bills) as paths:
+            if export_format == "zip":
+                write_zip(bills, paths, out)
+            else:
+                write_merged_pdf(paths, out)
+        out.seek(0)
 
         return FileResponse(
-            pdf_buffer,
-            as_attachment=False,
-            filename=f"service-bill-{pk}.pdf",
-            content_type="application/pdf",
+            out,
+            as_attachment=True,
+            filename=f"service-bills.{export_format}",
+            content_type="application/zip" if export_format == "zip" else "application/pdf",
         )
         
+    def list(self, request, *args, **kwargs):
+        """
+        Summary rows (bill fields + section bill numbers and totals) read
+        with values(); ?detail=1 returns the full ServiceBillSerializer form.
+        """
+        if self._detail_list():
+            return super().list(request, *args, **kwargs)
+
+        rows = self.filter_queryset(self.get_queryset()).values(*SERVICE_BILL_SUMMARY_FIELDS)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(service_bill_summaries(page))
+        return Response(service_bill_summaries(rows))
+
+    def _detail_list(self):
+        return self.request.query_params.get("detail") == "1"
+
     def get_queryset(self):
-        return super().get_queryset()
\ No newline at end of file
+        qs = super().get_queryset()
+
+        # writes reload the bill in to_representation, after the save
+        if self.action == "retrieve" or (self.action == "list" and self._detail_list()):
+            return service_bill_read_queryset(qs)
+        return qs
+
+
+class JobViewSet(BaseViewSet):
+    """
+    Background jobs run by `manage.py run_jobs`, which has to run next to
+    the web server: without it every job stays QUEUED.
+    POST /jobs/ submits, GET /jobs/<id>/ polls, GET /jobs/<id>/result/ downloads.
+    Result files are deleted JOB_RESULTS_MAX_AGE after the job finished.
+    """
+    queryset = BackgroundJob.objects.all().order_by("-id")
+    serializer_class = BackgroundJobSerializer
+    http_method_names = ["get", "post", "head", "options"]
+    ordering_fields = ["id", "created_at"]
+
+    @action(detail=True, methods=["GET"])
+    def result(self, request, pk=None):
+        job = self.get_object()
+
+        if job.status != "DONE":
+            return Response(
+                {"detail": f"Job is {job.status}", "error": job.error},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        if job.kind in RESULT_FILENAMES:
+            if not job.result_path or not os.path.exists(job.result_path):
+                return Response(
+                    {"detail": "Result file expired, submit the job again"},
+                    status=status.HTTP_410_GONE
+                )
+            return FileResponse(
+                open(job.result_path, "rb"),
+                as_attachment=False,
+                filename=RESULT_FILENAMES[job.kind].format(**job.payload),
+                content_type="application/pdf",
+            )
+
+        return Response(job.result)
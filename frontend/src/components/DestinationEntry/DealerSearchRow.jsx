@@ -14,9 +14,10 @@ export default function DealerSearchRow({ destinationId, onAdd }) {
   const loadDealers = async (input) => {
     if (!destinationId) return [];
     const res = await axiosInstance.get(
-      `/dealers/by-destination/?destination_id=${destinationId}&search=${input}`
+      `/dealers/by-destination/?destination_id=${destinationId}&search=${input}&limit=50`
     );
-    return res.data.map((d) => ({
+    const data = res.data.results ?? res.data;
+    return data.map((d) => ({
       value: d.dealer_id,
       label: `${d.dealer_name} (${d.place_name} - ${d.distance}km)`,
       ...d,
@@ -58,8 +58,15 @@ export default function Dealers() {
   // -------------------------
   const fetchPlaces = async () => {
     try {
-      const res = await axiosInstance.get("/places/?all=1", {skipLoading: true});
-      setAllPlaces(res.data.results);
+      const res = await axiosInstance.get("/places/?all=1&columnar=1", {skipLoading: true});
+      const { ids, names, destination_ids, destinations } = res.data;
+      setAllPlaces(
+        ids.map((id, i) => ({
+          id,
+          name: names[i],
+          destination_name: destinations[destination_ids[i]],
+        }))
+      );
     } catch (err) {
       console.error(err);
     }
@@ -199,6 +199,9 @@ export default function DestinationEntryEdit() {
         to_address: form.to_address,
         range_entries: form.ranges.map((r) => {
           const dealer_entries = (r.dealer_entries || []).map((d) => ({
+            // saved rows keep their id so the backend updates them in place;
+            // rows added here only have a client-side uuid
+            ...(Number.isInteger(d.id) ? { id: d.id } : {}),
             dealer: d.dealer?.value ?? d.dealer,
             despatched_to: d.despatched_to || "",
             km: Number(d.km || 0),
@@ -215,6 +218,7 @@ export default function DestinationEntryEdit() {
           }));
 
           return {
+            ...(Number.isInteger(r.id) ? { id: r.id } : {}),
             rate_range: r.rate_range?.value ?? null,
             rate: Number(r.rate || 0),
             print_page_no: r.print_page_no ?? null,
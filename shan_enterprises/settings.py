@@ -162,6 +162,42 @@ STATICFILES_DIRS = [
 ]
 
 
+# Background jobs (python manage.py run_jobs). The worker must run next to
+# the web server: streaming dealer imports and ?async=1 prints are only
+# queued by the API and stay QUEUED/PENDING until a worker picks them up.
+JOB_RESULTS_DIR = os.path.join(BASE_DIR, 'job_results')
+# a RUNNING job older than this (seconds) lost its worker and is queued again
+JOB_STALE_AFTER = 30 * 60
+# result files (job-<id>.pdf) are deleted this many seconds after the job finished
+JOB_RESULTS_MAX_AGE = 24 * 60 * 60
+
+# Rendered PDFs, reused while their source rows are unchanged (erp/pdf_cache.py)
+PDF_CACHE_DIR = os.path.join(BASE_DIR, 'pdf_cache')
+PDF_CACHE_MAX_BYTES = 200 * 1024 * 1024  # least recently used files go first
+
+# Rendered PDFs larger than this are spooled to a temp file instead of RAM
+PDF_SPOOL_MAX_BYTES = 5 * 1024 * 1024
+
+# Render processes for batch service bill export, None = one per CPU core
+PDF_EXPORT_WORKERS = None
+# smaller exports render in the request process, the pool only pays off past this
+PDF_EXPORT_PARALLEL_MIN = 10
+
+# "reference" holds lookup list responses and their version stamps
+# (erp/reference_cache.py); file based so every worker sees a bump
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'reference': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'ref_cache'),
+        'TIMEOUT': 24 * 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 